@@ -1,27 +1,75 @@
 import asyncio
 import random
 import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
 import httpx
+import orjson
 
 from config import get_settings
 from models.incident import Incident, Fix, IncidentStatus
 from models.agent_messages import AgentStatus
+from services.http_clients import get_demo_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-TEST_SUITES = [
-    {"name": "Unit Tests", "total": 342, "duration_s": 12},
-    {"name": "Integration Tests", "total": 87, "duration_s": 34},
-    {"name": "E2E Tests", "total": 24, "duration_s": 89},
-    {"name": "Performance Tests", "total": 12, "duration_s": 45},
-    {"name": "Security Scan", "total": 156, "duration_s": 28},
-]
+# Private generator for the simulated artifacts (independent of global random state)
+_rng = random.Random()
 
-DEPLOY_STAGES = [
+
+def _draw_ints(bounds: tuple) -> list[int]:
+    """Draw one integer per inclusive (low, high) pair in a single pass."""
+    rand = _rng.random
+    return [lo + int(rand() * (hi - lo + 1)) for lo, hi in bounds]
+
+
+class Clock:
+    """Paces the simulated pipeline steps so the dashboard can follow them."""
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class NoopClock(Clock):
+    """Skips the demo pacing — used in production, where it is pure latency."""
+
+    async def sleep(self, seconds: float) -> None:
+        return None
+
+
+# Simulation-mode deployments are live demos, so they keep the pacing
+# unless TIMELINE_PACING_ENABLED switches all cosmetic pauses off
+_DEFAULT_CLOCK: Clock = (
+    NoopClock()
+    if not settings.TIMELINE_PACING_ENABLED
+    or (settings.APP_ENV == "production" and not settings.SIMULATION_MODE)
+    else Clock()
+)
+
+_DEPLOY_BOUNDS = ((1, 9), (0, 99), (1, 50), (3, 8), (45, 180))
+_ROLLBACK_BOUNDS = ((1, 5), (0, 50), (0, 20), (60, 120))
+
+
+@dataclass(frozen=True, slots=True)
+class TestSuite:
+    name: str
+    total: int
+    duration_s: int
+
+
+TEST_SUITES = (
+    TestSuite("Unit Tests", 342, 12),
+    TestSuite("Integration Tests", 87, 34),
+    TestSuite("E2E Tests", 24, 89),
+    TestSuite("Performance Tests", 12, 45),
+    TestSuite("Security Scan", 156, 28),
+)
+
+DEPLOY_STAGES = (
     "Building Docker image",
     "Pushing to container registry",
     "Updating Kubernetes manifests",
@@ -29,20 +77,34 @@ DEPLOY_STAGES = [
     "Running smoke tests",
     "Promoting to production",
     "Verifying deployment health",
-]
+)
+
+# Subsets actually exercised per run — sliced once at import
+_ACTIVE_TEST_SUITES = TEST_SUITES[:3]  # first 3 suites for speed
+_ACTIVE_DEPLOY_STAGES = DEPLOY_STAGES[:5]
+
+# Per-stage timeline details with the counter baked in; only {svc} varies
+_STAGE_DETAILS = tuple(
+    f"Stage {i}/{len(_ACTIVE_DEPLOY_STAGES)}: {stage} for {{svc}}"
+    for i, stage in enumerate(_ACTIVE_DEPLOY_STAGES, 1)
+)
 
 
 class DeployAgent:
-    def __init__(self, agent_status: AgentStatus):
+    def __init__(self, agent_status: AgentStatus, clock: Clock = _DEFAULT_CLOCK):
         self.name = "deploy"
         self.status = agent_status
+        self._clock = clock
         self._success_rate = 0.88  # 88% success rate for realism
+        # Shared keep-alive client — /health polls reuse pooled connections
+        self._client = get_demo_client()
+        self._health_url = httpx.URL(f"{settings.DEMO_APP_URL.rstrip('/')}/health")
 
     def _set_working(self, task: str):
         self.status.status = "working"
         self.status.current_task = task
         self.status.last_action = task
-        self.status.last_action_time = datetime.utcnow()
+        self.status.last_action_time_ns = time.monotonic_ns()
 
     def _set_idle(self):
         self.status.status = "idle"
@@ -54,17 +116,22 @@ class DeployAgent:
 
         all_passed = True
         results = []
-
-        for suite in TEST_SUITES[:3]:  # Run first 3 suites for speed
-            await asyncio.sleep(0.4)
-            failed = random.randint(0, 2) if random.random() > 0.9 else 0
-            passed = suite["total"] - failed
+        suites = _ACTIVE_TEST_SUITES
+        # Pre-draw per-suite failures: 10% chance of 0-2 failures each
+        fails = [
+            _rng.randint(0, 2) if _rng.random() > 0.9 else 0
+            for _ in suites
+        ]
+
+        for suite, failed in zip(suites, fails):
+            await self._clock.sleep(0.4)
+            passed = suite.total - failed
             results.append({
-                "suite": suite["name"],
+                "suite": suite.name,
                 "passed": passed,
                 "failed": failed,
-                "total": suite["total"],
-                "duration_s": suite["duration_s"],
+                "total": suite.total,
+                "duration_s": suite.duration_s,
                 "status": "passed" if failed == 0 else "failed",
             })
             if failed > 0:
@@ -76,7 +143,7 @@ class DeployAgent:
             "total_failed": sum(r["failed"] for r in results),
             "total_tests": sum(r["total"] for r in results),
             "suites": results,
-            "coverage": round(random.uniform(82, 96), 1),
+            "coverage": round(_rng.uniform(82, 96), 1),
         }
 
         incident.add_timeline_event(
@@ -88,8 +155,30 @@ class DeployAgent:
 
         return summary
 
+    # ── Pre-deploy checks (independent — run concurrently) ────────────────────
+
+    async def _check_code_review(self, fix: Fix) -> bool:
+        await self._clock.sleep(0.7)
+        return True
+
+    async def _check_security_scan(self, fix: Fix) -> bool:
+        await self._clock.sleep(0.7)
+        return _rng.random() > 0.05  # 95% pass
+
+    async def _check_staging(self, incident: Incident) -> bool:
+        await self._clock.sleep(0.7)
+        return _rng.random() > 0.1
+
+    async def _check_rollback(self, incident: Incident) -> bool:
+        await self._clock.sleep(0.7)
+        return True
+
+    async def _check_approval(self, fix: Fix) -> bool:
+        await self._clock.sleep(0.7)
+        return True
+
     async def validate_pre_deploy(self, incident: Incident, fix: Fix) -> bool:
-        """Run pre-deployment validation checks."""
+        """Run pre-deployment validation checks concurrently."""
         self._set_working("Pre-deploy validation")
 
         incident.add_timeline_event(
@@ -98,15 +187,22 @@ class DeployAgent:
             details="Validating: code review passed, security scan clean, staging environment healthy, rollback plan ready.",
             status="info",
         )
-        await asyncio.sleep(0.7)
-
-        checks = {
-            "code_review": True,
-            "security_scan": random.random() > 0.05,  # 95% pass
-            "staging_healthy": random.random() > 0.1,
-            "rollback_ready": True,
-            "change_approved": True,
-        }
+
+        names = ("code_review", "security_scan", "staging_healthy", "rollback_ready", "change_approved")
+        results = await asyncio.gather(
+            self._check_code_review(fix),
+            self._check_security_scan(fix),
+            self._check_staging(incident),
+            self._check_rollback(incident),
+            self._check_approval(fix),
+            return_exceptions=True,
+        )
+        checks = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"[DEPLOY] pre-deploy check {name} raised: {result}")
+                result = False
+            checks[name] = result
 
         all_passed = all(checks.values())
         incident.add_timeline_event(
@@ -128,18 +224,21 @@ class DeployAgent:
             status="info",
         )
 
-        # Simulate deployment stages
-        for i, stage in enumerate(DEPLOY_STAGES[:5]):
-            await asyncio.sleep(0.4)
-            incident.add_timeline_event(
-                agent=self.name,
-                action=stage,
-                details=f"Stage {i+1}/{len(DEPLOY_STAGES[:5])}: {stage} for {incident.service}",
-                status="info",
-            )
+        # Simulate deployment stages — collected and appended in one batch
+        pending = []
+        for stage, template in zip(_ACTIVE_DEPLOY_STAGES, _STAGE_DETAILS):
+            await self._clock.sleep(0.4)
+            pending.append({
+                "timestamp": datetime.utcnow(),
+                "agent": self.name,
+                "action": stage,
+                "details": template.format(svc=incident.service),
+                "status": "info",
+            })
+        incident.add_timeline_events(pending)
 
         # Simulate potential deployment failure
-        deploy_success = random.random() < self._success_rate
+        deploy_success = _rng.random() < self._success_rate
 
         if not deploy_success:
             incident.add_timeline_event(
@@ -150,7 +249,7 @@ class DeployAgent:
             )
             return {"success": False, "reason": "Health check failed post-deployment"}
 
-        await asyncio.sleep(0.5)
+        await self._clock.sleep(0.5)
         incident.add_timeline_event(
             agent=self.name,
             action="Post-deploy Validation",
@@ -160,11 +259,12 @@ class DeployAgent:
 
         self.status.incidents_handled += 1
         self._set_idle()
+        major, minor, patch, pods, duration = _draw_ints(_DEPLOY_BOUNDS)
         return {
             "success": True,
-            "deployed_version": f"v{random.randint(1, 9)}.{random.randint(0, 99)}.{random.randint(1, 50)}",
-            "pods_updated": random.randint(3, 8),
-            "rollout_duration_s": random.randint(45, 180),
+            "deployed_version": f"v{major}.{minor}.{patch}",
+            "pods_updated": pods,
+            "rollout_duration_s": duration,
         }
 
     async def rollback(self, incident: Incident) -> dict:
@@ -177,7 +277,7 @@ class DeployAgent:
             details=f"Reverting {incident.service} to last known-good version. ETA: 60-90 seconds.",
             status="warning",
         )
-        await asyncio.sleep(1.5)
+        await self._clock.sleep(1.5)
 
         incident.add_timeline_event(
             agent=self.name,
@@ -187,59 +287,93 @@ class DeployAgent:
         )
 
         self._set_idle()
+        major, minor, patch, duration = _draw_ints(_ROLLBACK_BOUNDS)
         return {
             "success": True,
-            "rolled_back_to": f"v{random.randint(1, 5)}.{random.randint(0, 50)}.{random.randint(0, 20)}-stable",
-            "duration_s": random.randint(60, 120),
+            "rolled_back_to": f"v{major}.{minor}.{patch}-stable",
+            "duration_s": duration,
         }
 
-    async def verify_remediation(self, incident: Incident, timeout_s: int = 30) -> dict:
+    async def verify_remediation(
+        self,
+        incident: Incident,
+        timeout_s: int = 30,
+        recovered: Optional[asyncio.Event] = None,
+    ) -> dict:
         """
-        Poll ShopDemo /health every 5 s for up to timeout_s seconds to confirm
-        the app returned to a healthy or degraded state after remediation.
+        Poll ShopDemo /health with exponential backoff (0.5 s doubling up to
+        5 s) for up to timeout_s seconds to confirm the app returned to a
+        healthy or degraded state after remediation.
+
+        If *recovered* is given, setting it (e.g. from the monitor's own
+        telemetry) wakes the poller immediately instead of waiting out the
+        current backoff delay.
         """
         self._set_working("Verifying ShopDemo remediation")
-        base = settings.DEMO_APP_URL
-        interval = 5
-        attempts = max(1, timeout_s // interval)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout_s
+        delay = 0.5
 
         incident.add_timeline_event(
             agent=self.name,
             action="Verification Started",
-            details=f"Polling {base}/health every {interval}s (max {timeout_s}s).",
+            details=f"Polling {self._health_url} with backoff 0.5s→5s (max {timeout_s}s).",
             status="info",
         )
 
         last_health: dict = {}
-        for attempt in range(1, attempts + 1):
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                async with httpx.AsyncClient(timeout=8.0) as client:
-                    resp = await client.get(f"{base}/health")
-                    if resp.status_code == 200:
-                        last_health = resp.json()
-                        status = last_health.get("status", "unknown")
-                        logger.info(
-                            f"[DEPLOY] verify attempt {attempt}/{attempts}: status={status}"
-                        )
-                        if status in ("healthy", "degraded"):
-                            incident.add_timeline_event(
-                                agent=self.name,
-                                action="Remediation Verified",
-                                details=(
-                                    f"ShopDemo status={status} after {attempt * interval}s. "
-                                    f"Memory={last_health.get('memory_usage_mb', '?')} MB, "
-                                    f"CPU={last_health.get('cpu_percent', '?')}%, "
-                                    f"ErrorRate={last_health.get('error_rate', '?')}%."
-                                ),
-                                status="success",
-                            )
-                            self._set_idle()
-                            return {"verified": True, "status": status, "health": last_health, "attempts": attempt}
-            except Exception as exc:
-                logger.warning(f"[DEPLOY] verify attempt {attempt} failed: {exc}")
-
-            if attempt < attempts:
-                await asyncio.sleep(interval)
+                resp = await self._client.get(self._health_url)
+                resp.raise_for_status()
+                body = orjson.loads(resp.content)
+                if not isinstance(body, dict):
+                    raise ValueError(f"expected a JSON object, got {type(body).__name__}")
+                last_health = body
+            except httpx.HTTPStatusError as exc:
+                logger.warning(
+                    f"[DEPLOY] verify attempt {attempt}: /health returned {exc.response.status_code}"
+                )
+            except httpx.RequestError as exc:
+                logger.warning(f"[DEPLOY] verify attempt {attempt} failed: {exc!r}")
+            except ValueError as exc:
+                logger.warning(f"[DEPLOY] verify attempt {attempt}: malformed /health body: {exc}")
+            else:
+                status = last_health.get("status", "unknown")
+                logger.info(
+                    f"[DEPLOY] verify attempt {attempt}: status={status}"
+                )
+                if status in ("healthy", "degraded"):
+                    incident.add_timeline_event(
+                        agent=self.name,
+                        action="Remediation Verified",
+                        details=(
+                            f"ShopDemo status={status} after {loop.time() - started:.1f}s. "
+                            f"Memory={last_health.get('memory_usage_mb', '?')} MB, "
+                            f"CPU={last_health.get('cpu_percent', '?')}%, "
+                            f"ErrorRate={last_health.get('error_rate', '?')}%."
+                        ),
+                        status="success",
+                    )
+                    self._set_idle()
+                    return {"verified": True, "status": status, "health": last_health, "attempts": attempt}
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            wait = min(delay, remaining)
+            if recovered is not None:
+                try:
+                    await asyncio.wait_for(recovered.wait(), timeout=wait)
+                    recovered.clear()
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(wait)
+            delay = min(5.0, delay * 2)
 
         # Timeout — still report whatever we got
         incident.add_timeline_event(
@@ -256,5 +390,5 @@ class DeployAgent:
             "verified": False,
             "status":   last_health.get("status", "unknown"),
             "health":   last_health,
-            "attempts": attempts,
+            "attempts": attempt,
         }
@@ -10,35 +10,234 @@ it to GPT-4o with an expert SRE/DevOps system prompt that includes few-shot
 examples. Response is parsed into the Diagnosis pydantic model.
 """
 import asyncio
-import json
+import hashlib
 import re
 import logging
-from datetime import datetime
+import time
+from functools import lru_cache, partial
+from types import MappingProxyType
 
-import httpx
+import orjson
 
 from config import get_settings
 from models.incident import Incident, IncidentSeverity, Diagnosis
 from models.agent_messages import AgentStatus
 from services.foundry_service import get_foundry_service
-from .agent_prompts import DIAGNOSTIC_SYSTEM_PROMPT
+from services.http_clients import get_demo_client
+from services.llm_cache import ResponseCache, SimilarityCache
+from services.pacing import paced_sleep
+from .agent_prompts import DIAGNOSTIC_PROMPT
 
 settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
+# Raw GPT-4o diagnosis JSON keyed on the normalized incident signature
+_diag_cache = ResponseCache("diagnosis", maxsize=512, ttl_s=settings.LLM_CACHE_TTL_S)
+# Near-duplicate fallback for incidents whose wording drifts past the exact
+# signature; tagged by (service, severity) so hits never cross services
+_diag_similar = SimilarityCache(
+    "diagnosis-similar",
+    maxsize=1000,
+    threshold=settings.LLM_SIMILARITY_THRESHOLD,
+    ttl_s=settings.LLM_CACHE_TTL_S,
+)
+_WORD_RE = re.compile(r"[a-z_][a-z0-9_]{2,}")
+
+# GPT-4o calls in flight per signature — concurrent identical incidents
+# await the first call's result instead of issuing their own
+_diag_inflight: dict[str, asyncio.Task] = {}
+
+
+def _diag_call_done(signature: str, task: asyncio.Task) -> None:
+    """Drop a finished shared call; retrieve its exception so an unawaited failure stays quiet."""
+    _diag_inflight.pop(signature, None)
+    if not task.cancelled():
+        task.exception()
+
+
+# Volatile tokens stripped before fingerprinting: ISO timestamps, trace ids,
+# hex addresses, and bare numbers (so "847 queries" ≈ "912 queries").
+_VOLATILE_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}T[\d:.]+Z?|trace=\w+|0x[0-9a-fA-F]+|\d+(?:[.,]\d+)*"
+)
+# Log levels that mark a line as part of the error signature — one alternation
+# so each line is scanned once instead of once per level
+_SIGNAL_RE = re.compile(r"ERROR|CRIT|WARN|FATAL")
+
+# Comma separator with surrounding whitespace, for list fields returned as strings
+_CSV_SPLIT_RE = re.compile(r"\s*,\s*")
+
+_SEVERITY_MAP = MappingProxyType({sev.value: sev for sev in IncidentSeverity})
+
+# Known failure signatures that identify a canned diagnosis outright:
+# (canned diagnosis kind, log/description markers, (metric, minimum) checks).
+# A rule fires only when every signal matches.
+_RULES = (
+    ("n_plus_one", ("query budget exceeded", "orm query"), (("cpu_percent", 90),)),
+    ("listener_leak", ("maxlistenersexceededwarning", "eventemitter memory leak"), (("memory_percent", 85),)),
+    ("oom_killed", ("oomkilled", "exit code: 137"), (("restart_count", 3),)),
+)
+
+# Streamed fields that are enough to announce a preliminary diagnosis
+_EARLY_FIELDS = ("root_cause", "severity", "confidence")
+
+
+def _match_rule(incident: Incident) -> str | None:
+    """Return the kind of the first rule whose signals all match, else None."""
+    m = incident.metrics_snapshot
+    text = f"{incident.description}\n{m.get('mock_logs', '')}".lower()
+    for kind, markers, thresholds in _RULES:
+        if all(marker in text for marker in markers) and all(
+            isinstance(m.get(key), (int, float)) and m[key] >= minimum
+            for key, minimum in thresholds
+        ):
+            return kind
+    return None
+
+
+@lru_cache(maxsize=256)
+def _signal_lines(logs: str) -> tuple[str, ...]:
+    """
+    First five ERROR/WARN lines of a log block.  Memoized: simulated
+    scenarios embed the same log string in every incident they produce.
+    """
+    return tuple(line for line in logs.splitlines() if _SIGNAL_RE.search(line))[:5]
+
+
+def _bucket(value, step: float) -> str:
+    """Round a numeric metric to a coarse bucket; non-numeric values pass through."""
+    if isinstance(value, (int, float)):
+        return f"{round(value / step) * step:g}"
+    return str(value)
+
+
+def _incident_fingerprint(incident: Incident) -> str:
+    """
+    Stable signature of an incident's error pattern: service, severity,
+    coarse metric buckets (CPU/memory to 10 %, error rate to 0.1), the
+    normalized description, and the first few ERROR/WARN log lines with
+    volatile tokens removed.  Recurring incidents of the same kind share a key.
+    """
+    m = incident.metrics_snapshot
+    signal = _signal_lines(m.get("mock_logs", "") or "")
+    parts = [
+        incident.service,
+        incident.severity.value,
+        _bucket(m.get("cpu_percent"), 10),
+        _bucket(m.get("memory_percent"), 10),
+        _bucket(m.get("error_rate"), 0.1),
+        _VOLATILE_RE.sub("#", incident.description),
+    ]
+    parts.extend(_VOLATILE_RE.sub("#", line).strip() for line in signal)
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def _incident_tokens(incident: Incident) -> frozenset:
+    """Word set of the description and error-level log lines, for similarity lookups."""
+    signal = _signal_lines(incident.metrics_snapshot.get("mock_logs", "") or "")
+    text = " ".join([incident.description, *signal]).lower()
+    return frozenset(_WORD_RE.findall(_VOLATILE_RE.sub(" ", text)))
+
+
+# Static framing sent ahead of the per-incident context, so it joins the
+# cacheable prompt prefix instead of leading the dynamic message
+_DIAG_PREAMBLE = (
+    "Analyze this production incident and provide root cause analysis. "
+    "The incident context follows in the next message."
+)
+
+# Incident context sent to GPT-4o; filled with str.format_map per incident
+_CTX_TEMPLATE = (
+    "INCIDENT ID:        {id}\n"
+    "SERVICE:            {service}\n"
+    "SEVERITY:           {severity}\n"
+    "TITLE:              {title}\n"
+    "DESCRIPTION:        {description}\n"
+    "ENVIRONMENT:        {environment}\n"
+    "AFFECTED USERS:     {affected_users:,}\n"
+    "ERROR COUNT (5min): {error_count:,}\n"
+    "\n"
+    "METRICS SNAPSHOT:\n"
+    "  cpu_percent:       {cpu_percent}%\n"
+    "  memory_percent:    {memory_percent}%\n"
+    "  memory_usage_mb:   {memory_usage_mb} MB\n"
+    "  error_rate:        {error_rate}\n"
+    "  avg_latency_ms:    {avg_latency_ms} ms\n"
+    "  db_connections:    {db_connections}\n"
+    "  restart_count:     {restart_count}\n"
+    "  last_exit_code:    {last_exit_code}\n"
+    "  replication_lag_s: {replication_lag_s} s\n"
+    "  request_rate:      {request_rate} req/s\n"
+    "  active_chaos:      {active_chaos}\n"
+    "\n"
+    "RECENT LOGS (last 15 min):\n{logs}\n"
+)
+# Placeholders for metrics a snapshot doesn't carry
+_METRIC_DEFAULTS = dict.fromkeys(
+    (
+        "cpu_percent", "memory_percent", "memory_usage_mb", "error_rate",
+        "db_connections", "restart_count", "last_exit_code", "replication_lag_s",
+        "request_rate", "active_chaos",
+    ),
+    "N/A",
+)
+
+# Only the head of the Prometheus exposition is sent to GPT-4o
+_PROM_HEAD_BYTES = 2000
+
+
+async def _read_head(client, path: str, limit: int) -> str | None:
+    """
+    GET *path* and return at most *limit* bytes of its body as text, without
+    downloading or decoding the rest.  Returns None on a non-200 response.
+    """
+    buf = bytearray()
+    # identity encoding: a compressed stream can't be cut off at a byte count
+    async with client.stream("GET", path, headers={"Accept-Encoding": "identity"}) as resp:
+        if resp.status_code != 200:
+            return None
+        async for chunk in resp.aiter_bytes():
+            buf += chunk
+            if len(buf) >= limit:
+                break
+    return buf[:limit].decode("utf-8", "replace")
+
+
+# Above this many input characters the context is built in a worker thread;
+# below it the thread hand-off costs more than the formatting itself
+_OFFLOAD_CONTEXT_CHARS = 16_384
+
+
+def _context_input_size(incident: Incident, demo_extra: dict | None) -> int:
+    size = len(incident.metrics_snapshot.get("mock_logs", "") or "")
+    if demo_extra:
+        size += len(demo_extra.get("prometheus_metrics", ""))
+    return size
+
+
+# Outermost {...} block in a response wrapped in prose or markdown fences
+_JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+
 
 def _safe_parse_json(raw: str, fallback: dict) -> dict:
     """Parse GPT-4o JSON response; return fallback dict if unparseable."""
+    # Fast path: response_format=json_object means this almost always succeeds
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        match = re.search(r"\{.*\}", raw, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group())
-            except json.JSONDecodeError:
-                pass
+        parsed = orjson.loads(raw)
+        if isinstance(parsed, dict):
+            return parsed
+    except orjson.JSONDecodeError:
+        pass
+    # No brace at all → no embedded object; skip the regex scan
+    match = _JSON_BLOCK_RE.search(raw) if "{" in raw else None
+    if match:
+        try:
+            parsed = orjson.loads(match.group())
+            if isinstance(parsed, dict):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
     logger.warning(
         f"DiagnosticAgent: Could not parse AI response as JSON — using fallback. "
         f"Preview: {raw[:200]}"
@@ -63,7 +262,7 @@ class DiagnosticAgent:
         self.status.status = "working"
         self.status.current_task = task
         self.status.last_action = task
-        self.status.last_action_time = datetime.utcnow()
+        self.status.last_action_time_ns = time.monotonic_ns()
 
     def _set_idle(self):
         self.status.status = "idle"
@@ -77,51 +276,42 @@ class DiagnosticAgent:
         Returns a dict with raw text + chaos experiment state.
         Falls back gracefully on network errors.
         """
-        base = settings.DEMO_APP_URL
+        client = get_demo_client()
         result = {}
+        metrics_head, chaos_resp = await asyncio.gather(
+            _read_head(client, "/metrics", _PROM_HEAD_BYTES),
+            client.get("/chaos/status"),
+            return_exceptions=True,
+        )
+        for path, resp in (("/metrics", metrics_head), ("/chaos/status", chaos_resp)):
+            if isinstance(resp, Exception):
+                logger.warning(f"DiagnosticAgent: demo {path} fetch failed: {resp}")
         try:
-            async with httpx.AsyncClient(timeout=6.0) as client:
-                metrics_resp = await client.get(f"{base}/metrics")
-                if metrics_resp.status_code == 200:
-                    result["prometheus_metrics"] = metrics_resp.text[:2000]
-
-                chaos_resp = await client.get(f"{base}/chaos/status")
-                if chaos_resp.status_code == 200:
-                    result["chaos_status"] = chaos_resp.json()
+            if isinstance(metrics_head, str):
+                result["prometheus_metrics"] = metrics_head
+            if not isinstance(chaos_resp, Exception) and chaos_resp.status_code == 200:
+                result["chaos_status"] = chaos_resp.json()
         except Exception as exc:
-            logger.warning(f"DiagnosticAgent: demo metrics fetch failed: {exc}")
+            logger.warning(f"DiagnosticAgent: demo metrics parse failed: {exc}")
         return result
 
     def _build_incident_context(self, incident: Incident, demo_extra: dict | None = None) -> str:
         """Format incident data as a structured context string for GPT-4o."""
         m = incident.metrics_snapshot
-        logs = m.get("mock_logs", "No structured logs captured in this snapshot.")
-
-        base = (
-            f"INCIDENT ID:        {incident.id}\n"
-            f"SERVICE:            {incident.service}\n"
-            f"SEVERITY:           {incident.severity.upper()}\n"
-            f"TITLE:              {incident.title}\n"
-            f"DESCRIPTION:        {incident.description}\n"
-            f"ENVIRONMENT:        {incident.environment}\n"
-            f"AFFECTED USERS:     {incident.affected_users:,}\n"
-            f"ERROR COUNT (5min): {incident.error_count:,}\n"
-            f"\n"
-            f"METRICS SNAPSHOT:\n"
-            f"  cpu_percent:       {m.get('cpu_percent', 'N/A')}%\n"
-            f"  memory_percent:    {m.get('memory_percent', 'N/A')}%\n"
-            f"  memory_usage_mb:   {m.get('memory_usage_mb', 'N/A')} MB\n"
-            f"  error_rate:        {m.get('error_rate', 'N/A')}\n"
-            f"  avg_latency_ms:    {m.get('avg_latency_ms', m.get('latency_p99_ms', 'N/A'))} ms\n"
-            f"  db_connections:    {m.get('db_connections', 'N/A')}\n"
-            f"  restart_count:     {m.get('restart_count', 'N/A')}\n"
-            f"  last_exit_code:    {m.get('last_exit_code', 'N/A')}\n"
-            f"  replication_lag_s: {m.get('replication_lag_s', 'N/A')} s\n"
-            f"  request_rate:      {m.get('request_rate', 'N/A')} req/s\n"
-            f"  active_chaos:      {m.get('active_chaos', 'N/A')}\n"
-            f"\n"
-            f"RECENT LOGS (last 15 min):\n{logs}\n"
+        ctx = {**_METRIC_DEFAULTS, **m}
+        ctx.update(
+            id=incident.id,
+            service=incident.service,
+            severity=incident.severity.upper(),
+            title=incident.title,
+            description=incident.description,
+            environment=incident.environment,
+            affected_users=incident.affected_users,
+            error_count=incident.error_count,
+            avg_latency_ms=m.get("avg_latency_ms", m.get("latency_p99_ms", "N/A")),
+            logs=m.get("mock_logs", "No structured logs captured in this snapshot."),
         )
+        parts = [_CTX_TEMPLATE.format_map(ctx)]
 
         if demo_extra:
             chaos = demo_extra.get("chaos_status", {})
@@ -132,35 +322,33 @@ class DiagnosticAgent:
                     for name, info in experiments.items()
                     if info.get("active")
                 ]
-                base += f"\nACTIVE CHAOS EXPERIMENTS:\n  {', '.join(active)}\n"
+                parts.append(f"\nACTIVE CHAOS EXPERIMENTS:\n  {', '.join(active)}\n")
             if demo_extra.get("prometheus_metrics"):
-                base += f"\nPROMETHEUS METRICS (live):\n{demo_extra['prometheus_metrics']}\n"
+                parts.append(f"\nPROMETHEUS METRICS (live):\n{demo_extra['prometheus_metrics']}\n")
 
-        return base
+        return "".join(parts)
 
     # ── Response parser ────────────────────────────────────────────────────────
 
     def _parse_ai_diagnosis(self, raw_json: dict, incident: Incident) -> Diagnosis:
         """Parse GPT-4o JSON response into a Diagnosis model with safe defaults."""
-        severity_map = {
-            "critical": IncidentSeverity.CRITICAL,
-            "high": IncidentSeverity.HIGH,
-            "medium": IncidentSeverity.MEDIUM,
-            "low": IncidentSeverity.LOW,
-        }
-        severity = severity_map.get(
-            str(raw_json.get("severity", "")).lower(),
-            incident.severity,
+        sev_key = raw_json.get("severity")
+        severity = (
+            _SEVERITY_MAP.get(sev_key.lower(), incident.severity)
+            if isinstance(sev_key, str)
+            else incident.severity
         )
 
         # Clamp confidence to a valid float range
-        confidence = float(raw_json.get("confidence", 0.80))
+        confidence = raw_json.get("confidence", 0.80)
+        if not isinstance(confidence, float):
+            confidence = float(confidence)
         confidence = max(0.01, min(0.99, confidence))
 
         # Normalize affected_services (may come as string or list from GPT-4o)
         affected = raw_json.get("affected_services", [incident.service])
         if isinstance(affected, str):
-            affected = [s.strip() for s in affected.split(",")]
+            affected = [svc for svc in _CSV_SPLIT_RE.split(affected.strip()) if svc]
 
         return Diagnosis(
             root_cause=raw_json.get(
@@ -176,6 +364,73 @@ class DiagnosticAgent:
             log_evidence=raw_json.get("log_evidence"),
         )
 
+    # ── GPT-4o call ────────────────────────────────────────────────────────────
+
+    async def _request_diagnosis(self, incident: Incident, context: str) -> dict:
+        """
+        Stream the diagnosis from GPT-4o, announcing the headline fields early.
+        Bounded by LLM_TIMEOUT_S; on timeout the caller gets a content-less result.
+        """
+        early: dict = {}
+        # The worker thread keeps streaming after a timeout; once the fallback
+        # has taken over, late partials from the abandoned call are dropped
+        timed_out = False
+
+        def _on_partial(fields: dict) -> None:
+            if timed_out:
+                return
+            # Surface the headline fields while the rest of the JSON is still decoding
+            announced = all(k in early for k in _EARLY_FIELDS)
+            early.update(fields)
+            if not announced and all(k in early for k in _EARLY_FIELDS):
+                incident.add_timeline_event(
+                    agent=self.name,
+                    action="Preliminary Root Cause",
+                    details=(
+                        f"[{str(early['severity']).upper()}] {early['root_cause']} "
+                        f"(confidence {early['confidence']})"
+                    ),
+                    status="info",
+                )
+
+        try:
+            return await asyncio.wait_for(
+                self._foundry.chat_completion(
+                    system_prompt=DIAGNOSTIC_PROMPT.text,
+                    prompt_cache_key=DIAGNOSTIC_PROMPT.key,
+                    user_preamble=_DIAG_PREAMBLE,
+                    user_message=context,
+                    temperature=0.1,
+                    max_tokens=1200,
+                    on_partial=_on_partial,
+                ),
+                timeout=settings.LLM_TIMEOUT_S,
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            # A hung request must not pin the agent in "working" — fall back
+            logger.warning(
+                f"DiagnosticAgent: GPT-4o did not respond within {settings.LLM_TIMEOUT_S}s "
+                f"for {incident.id} — using simulation fallback"
+            )
+            return {"content": None, "tokens_used": 0, "source": "timeout"}
+
+    async def _coalesced_diagnosis(self, signature: str, incident: Incident, context: str) -> dict:
+        """
+        Share one GPT-4o call between concurrent incidents with the same
+        signature: the first caller starts it as a task, every caller awaits
+        it through a shield, so cancelling any one of them (the starter
+        included) leaves the others' result intact.
+        """
+        task = _diag_inflight.get(signature)
+        if task is None:
+            task = asyncio.create_task(self._request_diagnosis(incident, context))
+            _diag_inflight[signature] = task
+            task.add_done_callback(partial(_diag_call_done, signature))
+        else:
+            logger.info(f"DiagnosticAgent: joining in-flight diagnosis for {incident.id}")
+        return await asyncio.shield(task)
+
     # ── Main method ────────────────────────────────────────────────────────────
 
     async def diagnose(self, incident: Incident) -> Diagnosis:
@@ -191,6 +446,12 @@ class DiagnosticAgent:
         self._set_working(f"Analyzing {incident.id}")
         use_real_ai = self._foundry.use_real_ai
         source_label = "GPT-4o / Azure OpenAI" if use_real_ai else "Simulation Engine"
+        # Start the live ShopDemo fetch now so it overlaps the steps below
+        demo_task = (
+            asyncio.create_task(self._fetch_demo_metrics())
+            if incident.service == "shopdemo"
+            else None
+        )
 
         # ── Step 1: Log collection ─────────────────────────────────────────────
         incident.add_timeline_event(
@@ -202,7 +463,7 @@ class DiagnosticAgent:
             ),
             status="info",
         )
-        await asyncio.sleep(0.5)
+        await paced_sleep(0.5)
 
         # ── Step 2: Azure Monitor KQL query ───────────────────────────────────
         incident.add_timeline_event(
@@ -216,45 +477,95 @@ class DiagnosticAgent:
             ),
             status="info",
         )
-        await asyncio.sleep(0.4)
+        await paced_sleep(0.4)
 
         # ── Step 3: AI analysis ────────────────────────────────────────────────
+        # Pre-call events are appended together, right before the model is queried
+        pending = []
         demo_extra = None
-        if incident.service == "shopdemo":
-            demo_extra = await self._fetch_demo_metrics()
+        if demo_task is not None:
+            demo_extra = await demo_task
             if demo_extra:
-                incident.add_timeline_event(
-                    agent=self.name,
-                    action="Live Demo-App Metrics Fetched",
-                    details=(
+                pending.append({
+                    "agent": self.name,
+                    "action": "Live Demo-App Metrics Fetched",
+                    "details": (
                         f"Fetched /metrics and /chaos/status from ShopDemo. "
                         f"Chaos active: {demo_extra.get('chaos_status', {}).get('any_active', False)}"
                     ),
+                    "status": "info",
+                })
+        rule_kind = (
+            _match_rule(incident)
+            if use_real_ai and settings.LLM_SKIP_HIGH_CONFIDENCE
+            else None
+        )
+        if rule_kind:
+            source_label = "Rule Engine"
+            result = {"content": None, "tokens_used": 0, "latency_ms": 0, "source": "rule_engine"}
+            pending.append({
+                "agent": self.name,
+                "action": "Diagnosis Resolved by Rule Engine",
+                "details": f"Known signature '{rule_kind}' matched on every signal — GPT-4o call skipped.",
+                "status": "info",
+            })
+            incident.add_timeline_events(pending)
+        else:
+            if _context_input_size(incident, demo_extra) > _OFFLOAD_CONTEXT_CHARS:
+                # Large log dumps: format off the loop so other incidents keep polling
+                context = await asyncio.to_thread(
+                    self._build_incident_context, incident, demo_extra
+                )
+            else:
+                context = self._build_incident_context(incident, demo_extra)
+            pending.append({
+                "agent": self.name,
+                "action": f"Sending Context to {source_label}",
+                "details": (
+                    f"Context: {len(context)} chars. "
+                    f"System prompt includes expert SRE few-shot examples. "
+                    f"Deployment: {self._foundry.deployment}"
+                ),
+                "status": "info",
+            })
+            incident.add_timeline_events(pending)
+
+            signature = _incident_fingerprint(incident) if use_real_ai else None
+            cache_key = signature if settings.LLM_CACHE_ENABLED else None
+            cached = _diag_cache.get(cache_key) if cache_key else None
+            hit_details = "Matching error signature diagnosed recently — reusing cached GPT-4o analysis."
+            if cache_key and cached is None:
+                sim_tag = (incident.service, incident.severity.value)
+                sim_tokens = _incident_tokens(incident)
+                cached = _diag_similar.get(sim_tag, sim_tokens)
+                if cached is not None:
+                    hit_details = (
+                        "Near-identical incident on the same service and severity diagnosed "
+                        "recently — reusing its GPT-4o analysis."
+                    )
+            if cached is not None:
+                result = {"content": cached, "tokens_used": 0, "latency_ms": 0, "source": "cache"}
+                incident.add_timeline_event(
+                    agent=self.name,
+                    action="Diagnosis Cache Hit",
+                    details=hit_details,
                     status="info",
                 )
-        context = self._build_incident_context(incident, demo_extra)
-        incident.add_timeline_event(
-            agent=self.name,
-            action=f"Sending Context to {source_label}",
-            details=(
-                f"Context: {len(context)} chars. "
-                f"System prompt includes expert SRE few-shot examples. "
-                f"Deployment: {self._foundry.deployment}"
-            ),
-            status="info",
-        )
-
-        result = await self._foundry.chat_completion(
-            system_prompt=DIAGNOSTIC_SYSTEM_PROMPT,
-            user_message=(
-                f"Analyze this production incident and provide root cause analysis:\n\n{context}"
-            ),
-            temperature=0.1,
-            max_tokens=1200,
-        )
+            else:
+                if signature:
+                    result = await self._coalesced_diagnosis(signature, incident, context)
+                else:
+                    result = await self._request_diagnosis(incident, context)
+                if cache_key and result.get("content"):
+                    _diag_cache.set(cache_key, result["content"])
+                    _diag_similar.set(sim_tag, sim_tokens, result["content"])
 
         # ── Step 4: Parse response ─────────────────────────────────────────────
-        fallback = self._foundry.get_mock_diagnosis()
+        fallback = (
+            self._foundry.get_canned_diagnosis(rule_kind)
+            if rule_kind
+            else self._foundry.get_mock_diagnosis()
+        )
 
         if result.get("content"):
             parsed = _safe_parse_json(result["content"], fallback)
@@ -270,7 +581,7 @@ class DiagnosticAgent:
         else:
             # Simulation or error fallback — always works without credentials
             diagnosis = self._parse_ai_diagnosis(fallback, incident)
-            tokens_info = "simulation mode"
+            tokens_info = "rule engine" if rule_kind else "simulation mode"
             logger.info(
                 f"DiagnosticAgent: Simulation data used for {incident.id} "
                 f"(source={result.get('source', 'unknown')})"
@@ -279,30 +590,33 @@ class DiagnosticAgent:
         incident.diagnosis = diagnosis
 
         # ── Step 5: Emit results to timeline ──────────────────────────────────
-        incident.add_timeline_event(
-            agent=self.name,
-            action="Root Cause Identified",
-            details=(
-                f"[{source_label}] [{tokens_info}] "
-                f"Confidence: {diagnosis.confidence:.0%}. "
-                f"{diagnosis.root_cause[:150]}"
-                f"{'...' if len(diagnosis.root_cause) > 150 else ''}"
-            ),
-            status="success",
-        )
-        incident.add_timeline_event(
-            agent=self.name,
-            action="Recommended Remediation",
-            details=diagnosis.recommended_action,
-            status="info",
-        )
+        results = [
+            {
+                "agent": self.name,
+                "action": "Root Cause Identified",
+                "details": (
+                    f"[{source_label}] [{tokens_info}] "
+                    f"Confidence: {diagnosis.confidence:.0%}. "
+                    f"{diagnosis.root_cause[:150]}"
+                    f"{'...' if len(diagnosis.root_cause) > 150 else ''}"
+                ),
+                "status": "success",
+            },
+            {
+                "agent": self.name,
+                "action": "Recommended Remediation",
+                "details": diagnosis.recommended_action,
+                "status": "info",
+            },
+        ]
         if diagnosis.error_pattern:
-            incident.add_timeline_event(
-                agent=self.name,
-                action="Error Pattern Captured",
-                details=f"Alerting rule candidate: {diagnosis.error_pattern}",
-                status="info",
-            )
+            results.append({
+                "agent": self.name,
+                "action": "Error Pattern Captured",
+                "details": f"Alerting rule candidate: {diagnosis.error_pattern}",
+                "status": "info",
+            })
+        incident.add_timeline_events(results)
 
         self.status.incidents_handled += 1
         self._set_idle()
@@ -10,36 +10,221 @@ remediation system prompt. GPT-4o returns a JSON object with file_path,
 original_code, fixed_code, explanation, and test_suggestions.
 """
 import asyncio
-import json
+import hashlib
+import itertools
 import re
-import random
 import logging
-from datetime import datetime
+import time
+from functools import partial
 
-import httpx
+import orjson
 
+from api.websocket import manager as ws_manager
 from config import get_settings
 from models.incident import Incident, Diagnosis, Fix
 from models.agent_messages import AgentStatus
-from services.foundry_service import get_foundry_service
+from services.foundry_service import FoundryService, LLMBatcher, get_foundry_service
 from services.github_service import get_github_service
-from .agent_prompts import FIXER_SYSTEM_PROMPT
+from services.http_clients import get_demo_client
+from services.llm_cache import ResponseCache, SimilarityCache
+from services.pacing import paced_sleep
+from .agent_prompts import FIXER_PROMPT
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Backoff between /health polls after /chaos/stop (first check is immediate)
+_HEALTH_POLL_DELAYS = (0.0, 0.1, 0.2, 0.4, 0.8, 1.2)
+_RECOVERED_STATUSES = ("healthy", "degraded")
+
+# Static instruction sent ahead of the per-incident prompt, so the cacheable
+# prefix runs past the system prompt (same layout as DiagnosticAgent)
+_FIX_PREAMBLE = (
+    "Generate a production-safe, minimal code fix that resolves the root cause "
+    "of the incident in the next message. The fix should be directly applicable — "
+    "include the exact file path, original code, and the corrected code with "
+    "inline comments."
+)
+
+# Per-incident fix request; filled with str.format_map per diagnosis
+_FIX_PROMPT_TEMPLATE = (
+    "INCIDENT: {title}\n"
+    "SERVICE: {service}\n"
+    "ENVIRONMENT: {environment}\n"
+    "\n"
+    "ROOT CAUSE:\n{root_cause}\n"
+    "\n"
+    "SEVERITY: {severity}\n"
+    "AFFECTED SERVICES: {affected_services}\n"
+    "CONFIDENCE: {confidence:.0%}\n"
+    "\n"
+    "RECOMMENDED ACTION:\n{recommended_action}\n"
+    "\n"
+    "ERROR PATTERN: {error_pattern}\n"
+    "LOG EVIDENCE: {log_evidence}\n"
+)
+
+_FIX_TEMPERATURE = 0.2   # Slightly higher for code creativity
+_FIX_MAX_TOKENS = 1800
+
+# Raw GPT-4o fix JSON keyed on the exact request (prompt + sampling params)
+_fix_cache = ResponseCache("fix", maxsize=256, ttl_s=settings.LLM_CACHE_TTL_S)
+# Recurring root causes whose wording drifts; tagged by (service, severity)
+# because a fix names concrete files in that service's codebase
+_fix_similar = SimilarityCache(
+    "fix-similar",
+    maxsize=500,
+    threshold=settings.LLM_SIMILARITY_THRESHOLD,
+    ttl_s=settings.LLM_CACHE_TTL_S,
+)
+_WORD_RE = re.compile(r"[a-z_][a-z0-9_]{2,}")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def _fix_cache_key(fix_prompt: str) -> str:
+    """Fingerprint everything that shapes the GPT-4o fix response."""
+    raw = f"{FIXER_PROMPT.key}|{_FIX_TEMPERATURE}|{_FIX_MAX_TOKENS}|{fix_prompt}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# ── Fix batching ──────────────────────────────────────────────────────────────
+
+_MULTI_FIX_HEADER = (
+    "Fix each of the {n} incidents below independently. Respond with a JSON "
+    'object {{"fixes": [...]}} holding exactly {n} fix objects in incident '
+    "order, each following the schema from the system prompt.\n\n"
+)
+
+
+class FixBatcher(LLMBatcher):
+    """
+    Coalesces fix prompts submitted within a short window into a single
+    multi-incident GPT-4o call.  A lone prompt, or a batch whose reply does
+    not hold one fix per incident, goes through the normal per-prompt path.
+    """
+
+    def __init__(self, foundry: FoundryService, window_s: float = 0.05, max_batch: int = 4):
+        super().__init__(self._single, window_s=window_s, max_batch=max_batch)
+        self._foundry = foundry
+
+    async def _single(self, fix_prompt: str) -> dict:
+        return await self._foundry.chat_completion(
+            system_prompt=FIXER_PROMPT.text,
+            prompt_cache_key=FIXER_PROMPT.key,
+            user_preamble=_FIX_PREAMBLE,
+            user_message=fix_prompt,
+            temperature=_FIX_TEMPERATURE,
+            max_tokens=_FIX_MAX_TOKENS,
+        )
+
+    async def _dispatch(self, batch: list) -> None:
+        if len(batch) == 1:
+            return await super()._dispatch(batch)
+
+        n = len(batch)
+        user_message = _MULTI_FIX_HEADER.format(n=n) + "\n\n".join(
+            f"### INCIDENT {i}\n{kwargs['fix_prompt']}"
+            for i, (_, kwargs) in enumerate(batch, 1)
+        )
+        fixes = None
+        try:
+            result = await self._foundry.chat_completion(
+                system_prompt=FIXER_PROMPT.text,
+                prompt_cache_key=FIXER_PROMPT.key,
+                user_preamble=_FIX_PREAMBLE,
+                user_message=user_message,
+                temperature=_FIX_TEMPERATURE,
+                max_tokens=_FIX_MAX_TOKENS * n,
+            )
+            if result.get("content"):
+                fixes = orjson.loads(result["content"]).get("fixes")
+        except Exception as exc:
+            # Never strand the batch's callers — the per-prompt path below
+            # resolves every future, with an exception if it must
+            logger.warning(f"FixBatcher: batched call failed: {exc}")
+        if not (isinstance(fixes, list) and len(fixes) == n):
+            logger.warning(
+                f"FixBatcher: batched reply unusable for {n} incidents — "
+                f"falling back to per-incident calls"
+            )
+            return await super()._dispatch(batch)
+
+        logger.info(f"FixBatcher: {n} fixes generated in one call")
+        for (fut, _), item in zip(batch, fixes):
+            if not fut.done():
+                fut.set_result({
+                    **result,
+                    "content": orjson.dumps(item).decode(),
+                    "tokens_used": result.get("tokens_used", 0) // n,
+                })
+
+
+_fix_batcher: FixBatcher | None = None
+
+
+def _get_fix_batcher(foundry: FoundryService) -> FixBatcher:
+    """Shared across FixerAgent instances so concurrent pipelines batch together."""
+    global _fix_batcher
+    if _fix_batcher is None:
+        _fix_batcher = FixBatcher(foundry)
+    return _fix_batcher
+
+
+# PR creation running in the background, by incident id (see generate_fix)
+_pr_tasks: dict[str, asyncio.Task] = {}
+
+# Simulated / fallback PR numbers — monotonic, so two simulated PRs never collide
+_fake_pr_numbers = itertools.count(1000)
+
+# Fire-and-forget dashboard broadcasts; strong refs until each task finishes
+_broadcast_tasks: set = set()
+
+
+def _broadcast_soon(**event) -> None:
+    """Schedule an informational broadcast without gating the caller on WS fan-out."""
+    task = asyncio.create_task(ws_manager.broadcast_event(**event))
+    _broadcast_tasks.add(task)
+    task.add_done_callback(_broadcast_tasks.discard)
+
+
+def _pr_task_done(incident_id: str, task: asyncio.Task) -> None:
+    """Forget a finished PR task and log its failure, since nobody may await it."""
+    _pr_tasks.pop(incident_id, None)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(
+            f"FixerAgent: background PR creation failed for {incident_id}: {exc}",
+            exc_info=exc,
+        )
+
+
+def _diagnosis_tokens(diagnosis: Diagnosis) -> frozenset:
+    """Word set of the root cause and recommended action, for similarity lookups."""
+    text = f"{diagnosis.root_cause} {diagnosis.recommended_action}".lower()
+    return frozenset(_WORD_RE.findall(_NUMBER_RE.sub(" ", text)))
+
 
 def _safe_parse_json(raw: str, fallback: dict) -> dict:
     """Parse GPT-4o JSON response; return fallback dict if unparseable."""
+    # Fast path: response_format=json_object means this almost always succeeds
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        match = re.search(r"\{.*\}", raw, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group())
-            except json.JSONDecodeError:
-                pass
+        parsed = orjson.loads(raw)
+        if isinstance(parsed, dict):
+            return parsed
+    except orjson.JSONDecodeError:
+        pass
+    # Prose around the object: slice first "{" to last "}" — the same span as a
+    # greedy r"\{.*\}" match, found with two linear scans instead of a regex
+    start, end = raw.find("{"), raw.rfind("}")
+    if start != -1 and end > start:
+        try:
+            parsed = orjson.loads(raw[start:end + 1])
+            if isinstance(parsed, dict):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
     logger.warning(
         f"FixerAgent: Could not parse AI response as JSON — using fallback. "
         f"Preview: {raw[:200]}"
@@ -64,7 +249,7 @@ class FixerAgent:
         self.status.status = "working"
         self.status.current_task = task
         self.status.last_action = task
-        self.status.last_action_time = datetime.utcnow()
+        self.status.last_action_time_ns = time.monotonic_ns()
 
     def _set_idle(self):
         self.status.status = "idle"
@@ -74,39 +259,32 @@ class FixerAgent:
 
     def _build_fix_prompt(self, incident: Incident, diagnosis: Diagnosis) -> str:
         """Construct the user message for the fix generation prompt."""
-        return (
-            f"INCIDENT: {incident.title}\n"
-            f"SERVICE: {incident.service}\n"
-            f"ENVIRONMENT: {incident.environment}\n"
-            f"\n"
-            f"ROOT CAUSE:\n{diagnosis.root_cause}\n"
-            f"\n"
-            f"SEVERITY: {diagnosis.severity.upper()}\n"
-            f"AFFECTED SERVICES: {', '.join(diagnosis.affected_services)}\n"
-            f"CONFIDENCE: {diagnosis.confidence:.0%}\n"
-            f"\n"
-            f"RECOMMENDED ACTION:\n{diagnosis.recommended_action}\n"
-            f"\n"
-            f"ERROR PATTERN: {diagnosis.error_pattern or 'N/A'}\n"
-            f"LOG EVIDENCE: {diagnosis.log_evidence or 'N/A'}\n"
-            f"\n"
-            f"Generate a production-safe, minimal code fix that resolves this root cause. "
-            f"The fix should be directly applicable — include the exact file path, "
-            f"original code, and the corrected code with inline comments."
-        )
+        return _FIX_PROMPT_TEMPLATE.format_map({
+            "title": incident.title,
+            "service": incident.service,
+            "environment": incident.environment,
+            "root_cause": diagnosis.root_cause,
+            "severity": diagnosis.severity.upper(),
+            "affected_services": ", ".join(diagnosis.affected_services),
+            "confidence": diagnosis.confidence,
+            "recommended_action": diagnosis.recommended_action,
+            "error_pattern": diagnosis.error_pattern or "N/A",
+            "log_evidence": diagnosis.log_evidence or "N/A",
+        })
 
     # ── Response parser ────────────────────────────────────────────────────────
 
     def _parse_ai_fix(self, raw_json: dict, incident: Incident, diagnosis: Diagnosis) -> Fix:
         """Parse GPT-4o JSON response into a Fix model with safe defaults."""
+        # Formatted defaults are built only when the model omitted the field
         return Fix(
-            description=raw_json.get(
-                "description",
-                f"Auto-fix for: {diagnosis.root_cause[:60]}",
+            description=(
+                raw_json["description"] if "description" in raw_json
+                else f"Auto-fix for: {diagnosis.root_cause[:60]}"
             ),
-            file_path=raw_json.get(
-                "file_path",
-                f"src/services/{incident.service.replace('-', '_')}.ts",
+            file_path=(
+                raw_json["file_path"] if "file_path" in raw_json
+                else f"src/services/{incident.service.replace('-', '_')}.ts"
             ),
             original_code=raw_json.get("original_code", "// Original code"),
             fixed_code=raw_json.get("fixed_code", "// Fixed code"),
@@ -122,7 +300,7 @@ class FixerAgent:
           1. Analyze codebase context
           2. Send diagnosis to GPT-4o (or simulation fallback)
           3. Parse JSON response into Fix model
-          4. Create Pull Request
+          4. Create Pull Request in the background (see wait_for_pull_request)
           5. Emit detailed WebSocket timeline events throughout
         """
         self._set_working(f"Generating fix for {incident.id}")
@@ -139,7 +317,7 @@ class FixerAgent:
             ),
             status="info",
         )
-        await asyncio.sleep(0.6)
+        await paced_sleep(0.6)
 
         # ── Step 2: AI fix generation ──────────────────────────────────────────
         fix_prompt = self._build_fix_prompt(incident, diagnosis)
@@ -153,15 +331,67 @@ class FixerAgent:
             status="info",
         )
 
-        result = await self._foundry.chat_completion(
-            system_prompt=FIXER_SYSTEM_PROMPT,
-            user_message=fix_prompt,
-            temperature=0.2,   # Slightly higher for code creativity
-            max_tokens=1800,
+        gh = get_github_service()
+        branch_task: asyncio.Task | None = None
+
+        def _on_partial(fields: dict) -> None:
+            # file_path leads the streamed JSON — start the PR branch while
+            # GPT-4o is still writing fixed_code
+            nonlocal branch_task
+            if "file_path" not in fields or branch_task is not None:
+                return
+            incident.add_timeline_event(
+                agent=self.name,
+                action="Fix Target Identified",
+                details=f"GPT-4o is patching {fields['file_path']}. Fix still streaming…",
+                status="info",
+            )
+            if gh.enabled:
+                branch_task = asyncio.create_task(gh.create_fix_branch(incident.id))
+
+        cache_key = (
+            _fix_cache_key(fix_prompt)
+            if use_real_ai and settings.FIXER_CACHE_ENABLED
+            else None
         )
+        cached = _fix_cache.get(cache_key) if cache_key else None
+        hit_details = "Identical diagnosis fixed recently — reusing cached GPT-4o fix."
+        if cache_key and cached is None:
+            sim_tag = (incident.service, diagnosis.severity)
+            sim_tokens = _diagnosis_tokens(diagnosis)
+            cached = _fix_similar.get(sim_tag, sim_tokens)
+            if cached is not None:
+                hit_details = (
+                    "Near-identical root cause on the same service fixed recently — "
+                    "reusing its GPT-4o fix."
+                )
+        if cached is not None:
+            result = {"content": cached, "tokens_used": 0, "latency_ms": 0, "source": "cache"}
+            incident.add_timeline_event(
+                agent=self.name,
+                action="Fix Cache Hit",
+                details=hit_details,
+                status="info",
+            )
+        else:
+            if use_real_ai and settings.FIXER_BATCH_ENABLED:
+                result = await _get_fix_batcher(self._foundry).submit(fix_prompt=fix_prompt)
+            else:
+                result = await self._foundry.chat_completion(
+                    system_prompt=FIXER_PROMPT.text,
+                    prompt_cache_key=FIXER_PROMPT.key,
+                    user_preamble=_FIX_PREAMBLE,
+                    user_message=fix_prompt,
+                    temperature=_FIX_TEMPERATURE,
+                    max_tokens=_FIX_MAX_TOKENS,
+                    on_partial=_on_partial if use_real_ai else None,
+                )
+            if cache_key and result.get("content"):
+                _fix_cache.set(cache_key, result["content"])
+                _fix_similar.set(sim_tag, sim_tokens, result["content"])
 
         # ── Step 3: Parse response ─────────────────────────────────────────────
-        fallback = self._foundry.get_mock_fix()
+        fallback = self._foundry.get_mock_fix(diagnosis.root_cause)
 
         if result.get("content"):
             parsed = _safe_parse_json(result["content"], fallback)
@@ -208,12 +438,30 @@ class FixerAgent:
                 status="info",
             )
 
-        # ── Step 4: Create Pull Request ────────────────────────────────────────
-        await asyncio.sleep(0.4)
-        pr = await self.create_pull_request(incident, fix, diagnosis)
+        # ── Step 4: Create Pull Request (in the background) ────────────────────
+        # Nothing before the deploy step needs the PR, so the GitHub round trips
+        # overlap with remediation and validation; see wait_for_pull_request().
+        incident.fix = fix
+        task = asyncio.create_task(self._open_pull_request(incident, fix, diagnosis, branch_task))
+        _pr_tasks[incident.id] = task
+        task.add_done_callback(partial(_pr_task_done, incident.id))
+
+        self.status.incidents_handled += 1
+        self._set_idle()
+        return fix
+
+    async def _open_pull_request(
+        self,
+        incident: Incident,
+        fix: Fix,
+        diagnosis: Diagnosis,
+        branch_task: asyncio.Task | None,
+    ) -> None:
+        """Create the PR for a generated fix and record it on the Fix."""
+        await paced_sleep(0.4)
+        pr = await self.create_pull_request(incident, fix, diagnosis, branch_task=branch_task)
         fix.pr_url = pr["url"]
         fix.pr_number = pr["number"]
-        incident.fix = fix
 
         incident.add_timeline_event(
             agent=self.name,
@@ -226,9 +474,11 @@ class FixerAgent:
             status="success",
         )
 
-        self.status.incidents_handled += 1
-        self._set_idle()
-        return fix
+    async def wait_for_pull_request(self, incident_id: str) -> None:
+        """Wait until the PR started by generate_fix is open (no-op if already done)."""
+        task = _pr_tasks.get(incident_id)
+        if task is not None:
+            await task
 
     async def remediate_demo_app(self, incident: Incident, diagnosis: Diagnosis) -> dict:
         """
@@ -246,18 +496,24 @@ class FixerAgent:
         )
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                stop_resp = await client.post(f"{base}/chaos/stop")
-                stop_data = stop_resp.json() if stop_resp.status_code == 200 else {}
+            client = get_demo_client()
+            stop_resp = await client.post("/chaos/stop", timeout=10.0)
+            stop_data = stop_resp.json() if stop_resp.status_code == 200 else {}
+
+            # Verify health after stopping chaos — poll with backoff instead of a
+            # fixed 2 s wait; a failed stop gets a single check
+            delays = _HEALTH_POLL_DELAYS if stop_resp.status_code == 200 else (0.0,)
+            for delay in delays:
+                if delay:
+                    await asyncio.sleep(delay)
+                health_resp = await client.get("/health", timeout=10.0)
+                health_data = orjson.loads(health_resp.content) if health_resp.status_code == 200 else {}
+                new_status = health_data.get("status", "unknown")
+                if new_status in _RECOVERED_STATUSES:
+                    break
 
-                # Verify health after stopping chaos
-                await asyncio.sleep(2)
-                health_resp = await client.get(f"{base}/health")
-                health_data = health_resp.json() if health_resp.status_code == 200 else {}
-
-            new_status = health_data.get("status", "unknown")
             stopped = stop_data.get("stopped", [])
-            success = new_status in ("healthy", "degraded") and stop_resp.status_code == 200
+            success = new_status in _RECOVERED_STATUSES and stop_resp.status_code == 200
 
             incident.add_timeline_event(
                 agent=self.name,
@@ -288,16 +544,23 @@ class FixerAgent:
             )
             return {"success": False, "error": str(exc)}
 
-    async def create_pull_request(self, incident: Incident, fix: Fix, diagnosis: Diagnosis) -> dict:
+    async def create_pull_request(
+        self,
+        incident: Incident,
+        fix: Fix,
+        diagnosis: Diagnosis,
+        branch_task: asyncio.Task | None = None,
+    ) -> dict:
         """Create a GitHub Pull Request for the generated fix.
 
         Uses the real GitHub REST API when GITHUB_TOKEN is configured;
-        falls back to a simulated PR dict otherwise.
+        falls back to a simulated PR dict otherwise.  branch_task, if given,
+        is a create_fix_branch call already started while the fix streamed.
         """
         gh = get_github_service()
         if not gh.enabled:
             logger.info("[FIXER] GitHub integration disabled (no GITHUB_TOKEN)")
-            pr_number = random.randint(100, 999)
+            pr_number = next(_fake_pr_numbers)
             branch = f"auto-fix/{incident.id.lower()}-{fix.fix_id}"
             return {
                 "number": pr_number,
@@ -308,8 +571,6 @@ class FixerAgent:
             }
 
         # Real GitHub PR flow
-        from api.websocket import manager as ws_manager
-
         diag_dict = diagnosis.model_dump() if diagnosis else {}
 
         try:
@@ -320,13 +581,13 @@ class FixerAgent:
                 details=f"Creating branch fix/agent-{incident.id}… on GitHub",
                 status="info",
             )
-            await ws_manager.broadcast_event(
+            _broadcast_soon(
                 event_type="agent_activity",
                 data={"message": f"Creating fix branch: fix/agent-{incident.id}…"},
                 agent=self.name,
                 incident_id=incident.id,
             )
-            branch = await gh.create_fix_branch(incident.id)
+            branch = await (branch_task or gh.create_fix_branch(incident.id))
 
             # Step 2 — Commit fix file
             incident.add_timeline_event(
@@ -335,7 +596,7 @@ class FixerAgent:
                 details=f"Committing fix report to fixes/{incident.id}.md on branch {branch}",
                 status="info",
             )
-            await ws_manager.broadcast_event(
+            _broadcast_soon(
                 event_type="agent_activity",
                 data={"message": f"Committing fix documentation to {branch}…"},
                 agent=self.name,
@@ -369,7 +630,8 @@ class FixerAgent:
             incident.github_pr_number = pr_result["pr_number"]
             incident.github_branch = branch
 
-            # Broadcast PR created event for the dashboard
+            # Broadcast PR created event for the dashboard — awaited so it lands
+            # before the pipeline moves on to deploy
             await ws_manager.broadcast_event(
                 event_type="github_pr_created",
                 data={
@@ -382,7 +644,7 @@ class FixerAgent:
                 agent=self.name,
                 incident_id=incident.id,
             )
-            await ws_manager.broadcast_event(
+            _broadcast_soon(
                 event_type="agent_activity",
                 data={
                     "message": (
@@ -412,7 +674,7 @@ class FixerAgent:
                 status="warning",
             )
             # Fallback — don't break the pipeline
-            pr_number = random.randint(100, 999)
+            pr_number = next(_fake_pr_numbers)
             return {
                 "number": pr_number,
                 "url": f"https://github.com/{settings.GITHUB_REPO}/pull/{pr_number}",
@@ -12,22 +12,111 @@ anomalies are detected.
 import asyncio
 import random
 import logging
-from collections import deque
+import statistics
+import time
+from array import array
+from collections import ChainMap, deque
+from dataclasses import dataclass
+from operator import itemgetter
 from datetime import datetime, timedelta
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Final, Mapping, Optional
 
-import httpx
+import orjson
 
 from config import get_settings
 from models.incident import Incident, IncidentSeverity
 from models.agent_messages import AgentStatus
+from services.http_clients import get_demo_client
+from services.pacing import simulated_latency
 
 settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
+# Private generator for simulated metrics and scenario picks (independent of
+# global random state)
+_rng = random.Random()
+
+# (low, high) for cpu_percent, memory_percent, error_rate, latency_p99_ms and
+# hours since last deploy (floored, so 1–72 like randint(1, 72))
+_PIPELINE_METRIC_BOUNDS = ((10, 99), (20, 95), (0, 0.5), (50, 15000), (1, 73))
+
+
+# Anomaly limits for simulated pipelines
+_CPU_TH: Final = 90
+_MEM_TH: Final = 88
+_ERR_TH: Final = 0.2
+_LAT_TH: Final = 5000
+
+# (metric, limit, issue message); a value above its limit is a breach
+_PIPELINE_RULES = (
+    ("cpu_percent",    _CPU_TH, "CPU at {v}%"),
+    ("memory_percent", _MEM_TH, "Memory at {v}%"),
+    ("error_rate",     _ERR_TH, "Error rate at {v:.1%}"),
+    ("latency_p99_ms", _LAT_TH, "P99 latency at {v}ms"),
+)
+
+
+def _draw_floats(bounds: tuple) -> list[float]:
+    """Draw one uniform float per (low, high) pair in a single pass."""
+    rand = _rng.random
+    return [lo + (hi - lo) * rand() for lo, hi in bounds]
+
+
+# Uniform draws for per-incident defaults, refilled 1024 at a time in one pass
+_RAND_POOL_SIZE = 1024
+_rand_pool: list[float] = []
+
+
+def _pooled_randint(lo: int, hi: int) -> int:
+    """Random integer in [lo, hi] taken from the pre-drawn pool."""
+    if not _rand_pool:
+        rand = _rng.random
+        _rand_pool.extend([rand() for _ in range(_RAND_POOL_SIZE)])
+    return lo + int(_rand_pool.pop() * (hi - lo + 1))
+
+
 # ─── Real-time metric history (last 60 readings ≈ 10 min at 10 s interval) ────
-metric_history: deque = deque(maxlen=60)
+_HISTORY_SIZE = 60
+# Raw /health payloads, served as-is by /monitoring/history
+metric_history: deque = deque(maxlen=_HISTORY_SIZE)
+
+# The numeric columns of the same readings in a preallocated float32 ring
+# (row-major, one row per reading) for trend analysis without dict walks
+HISTORY_COLUMNS = ("memory_usage_mb", "cpu_percent", "error_rate", "avg_latency_ms", "request_count")
+_N_COLS = len(HISTORY_COLUMNS)
+_history = array("f", bytes(4 * _HISTORY_SIZE * _N_COLS))
+_history_idx = 0
+_history_len = 0
+
+
+def _record_metrics(data: dict) -> None:
+    """Write one reading's numeric columns into the ring buffer."""
+    global _history_idx, _history_len
+    start = _history_idx * _N_COLS
+    _history[start:start + _N_COLS] = array(
+        "f", [float(data.get(col) or 0.0) for col in HISTORY_COLUMNS]
+    )
+    _history_idx = (_history_idx + 1) % _HISTORY_SIZE
+    _history_len = min(_history_len + 1, _HISTORY_SIZE)
+
+
+def metric_series(column: str) -> list[float]:
+    """Values of one history column, oldest first."""
+    values = _history[HISTORY_COLUMNS.index(column)::_N_COLS]
+    if _history_len < _HISTORY_SIZE:
+        return values[:_history_len].tolist()
+    return (values[_history_idx:] + values[:_history_idx]).tolist()
+
+
+def metric_trend(column: str) -> Optional[float]:
+    """Least-squares slope of a history column per hour, or None with < 2 readings."""
+    series = metric_series(column)
+    if len(series) < 2:
+        return None
+    slope = statistics.linear_regression(range(len(series)), series).slope
+    return slope * 3600.0 / settings.MONITORING_INTERVAL_SECONDS
 
 # ─── Real demo-app polling ─────────────────────────────────────────────────────
 
@@ -36,66 +125,105 @@ async def poll_demo_app() -> Optional[dict]:
     Fetch /health from the real ShopDemo app.
     Returns the parsed JSON or None on network error.
     """
-    url = f"{settings.DEMO_APP_URL}/health"
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
-            data["_polled_at"] = datetime.utcnow().isoformat()
-            metric_history.append(data)
-            return data
+        resp = await get_demo_client().get("/health")
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+        data["_polled_at"] = datetime.utcnow().isoformat()
+        metric_history.append(data)
+        _record_metrics(data)
+        return data
     except Exception as exc:
-        logger.warning(f"[MONITOR] poll_demo_app failed: {exc}")
+        logger.warning("[MONITOR] poll_demo_app failed: %s", exc)
         return None
 
 
+_SEV_BY_RANK = (
+    IncidentSeverity.LOW,
+    IncidentSeverity.MEDIUM,
+    IncidentSeverity.HIGH,
+    IncidentSeverity.CRITICAL,
+)
+_SEV_RANK = {sev: rank for rank, sev in enumerate(_SEV_BY_RANK)}
+# Title prefix per severity ("[CRITICAL]", ...), shared by simulated and
+# ShopDemo incidents; derived from the enum so new severities can't be missed
+_SEV_PREFIX = MappingProxyType({sev: f"[{sev.name}]" for sev in IncidentSeverity})
+
+
+def _bump(severity: IncidentSeverity, floor: IncidentSeverity) -> IncidentSeverity:
+    """Raise severity to at least floor (never lowers it)."""
+    return _SEV_BY_RANK[max(_SEV_RANK[severity], _SEV_RANK[floor])]
+
+
+# One row per metric: (health key, scale to threshold units, critical
+# threshold, severity floor when critical, critical message, degraded
+# threshold, severity floor when degraded, degraded message).  Messages get
+# the raw value as {v} and the threshold in display units as {t}.
+_HEALTH_RULES = (
+    ("memory_usage_mb", 1.0,
+     settings.ALERT_MEMORY_MB_CRITICAL, IncidentSeverity.CRITICAL, "memory {v:.0f} MB > {t:.0f} MB",
+     settings.ALERT_MEMORY_MB_DEGRADED, IncidentSeverity.HIGH, "memory {v:.0f} MB elevated"),
+    ("cpu_percent", 1.0,
+     settings.ALERT_CPU_PERCENT_CRITICAL, IncidentSeverity.CRITICAL, "CPU {v:.0f}% > {t:.0f}%",
+     settings.ALERT_CPU_PERCENT_DEGRADED, IncidentSeverity.LOW, "CPU {v:.0f}% elevated"),
+    # health endpoint returns error_rate in %, thresholds use a fraction
+    ("error_rate", 0.01,
+     settings.ALERT_ERROR_RATE_CRITICAL, IncidentSeverity.CRITICAL, "error rate {v:.1f}% > {t:.0f}%",
+     settings.ALERT_ERROR_RATE_DEGRADED, IncidentSeverity.HIGH, "error rate {v:.1f}% elevated"),
+    ("avg_latency_ms", 1.0,
+     settings.ALERT_LATENCY_MS_CRITICAL, IncidentSeverity.HIGH, "latency {v:.0f} ms > {t:.0f} ms",
+     settings.ALERT_LATENCY_MS_DEGRADED, IncidentSeverity.LOW, "latency {v:.0f} ms elevated"),
+)
+
+# Health payload fields read per poll (rule metrics first, in rule order) with
+# their defaults; merged over the payload and read in one itemgetter call
+_HEALTH_DEFAULTS = MappingProxyType({
+    **{rule[0]: 0 for rule in _HEALTH_RULES},
+    "active_chaos":  (),
+    "status":        "healthy",
+    "request_count": 0,
+})
+_HEALTH_FIELDS = itemgetter(*_HEALTH_DEFAULTS)
+
+
+# A healthy app whose rounded metrics haven't moved is re-broadcast only every
+# this many polls (≈ 1 min at the default 10 s interval)
+_HEARTBEAT_POLLS = 6
+
+
+def _broadcast_key(health: dict) -> tuple:
+    """Coarse fingerprint of a /health reading for dashboard change detection."""
+    mem, cpu, err, lat, chaos, status, _ = _HEALTH_FIELDS({**_HEALTH_DEFAULTS, **health})
+    return (
+        status,
+        round(mem or 0, -1),
+        round(cpu or 0),
+        round(err or 0, 1),
+        round(lat or 0, -1),
+        tuple(chaos or ()),
+    )
+
+
 def classify_demo_health(health: dict) -> Optional[dict]:
     """
     Compare health snapshot against configured thresholds.
     Returns an anomaly dict if any threshold is breached, else None.
     """
-    mem   = health.get("memory_usage_mb", 0)
-    cpu   = health.get("cpu_percent", 0)
-    err   = health.get("error_rate", 0)          # already in %
-    lat   = health.get("avg_latency_ms", 0)
-    chaos = health.get("active_chaos", [])
-    status = health.get("status", "healthy")
-
-    if status == "healthy":
+    if health.get("status", "healthy") == "healthy":
         return None
 
+    *readings, chaos, status, _ = _HEALTH_FIELDS({**_HEALTH_DEFAULTS, **health})
     issues = []
     severity = IncidentSeverity.LOW
 
-    if mem > settings.ALERT_MEMORY_MB_CRITICAL:
-        issues.append(f"memory {mem:.0f} MB > {settings.ALERT_MEMORY_MB_CRITICAL:.0f} MB")
-        severity = IncidentSeverity.CRITICAL
-    elif mem > settings.ALERT_MEMORY_MB_DEGRADED:
-        issues.append(f"memory {mem:.0f} MB elevated")
-        severity = max(severity, IncidentSeverity.HIGH, key=lambda s: ["low","medium","high","critical"].index(s))
-
-    if cpu > settings.ALERT_CPU_PERCENT_CRITICAL:
-        issues.append(f"CPU {cpu:.0f}% > {settings.ALERT_CPU_PERCENT_CRITICAL:.0f}%")
-        severity = IncidentSeverity.CRITICAL
-    elif cpu > settings.ALERT_CPU_PERCENT_DEGRADED:
-        issues.append(f"CPU {cpu:.0f}% elevated")
-
-    err_frac = err / 100.0  # health endpoint returns %, thresholds use fraction
-    if err_frac > settings.ALERT_ERROR_RATE_CRITICAL:
-        issues.append(f"error rate {err:.1f}% > {settings.ALERT_ERROR_RATE_CRITICAL*100:.0f}%")
-        severity = IncidentSeverity.CRITICAL
-    elif err_frac > settings.ALERT_ERROR_RATE_DEGRADED:
-        issues.append(f"error rate {err:.1f}% elevated")
-        if severity == IncidentSeverity.LOW:
-            severity = IncidentSeverity.HIGH
-
-    if lat > settings.ALERT_LATENCY_MS_CRITICAL:
-        issues.append(f"latency {lat:.0f} ms > {settings.ALERT_LATENCY_MS_CRITICAL:.0f} ms")
-        if severity == IncidentSeverity.LOW:
-            severity = IncidentSeverity.HIGH
-    elif lat > settings.ALERT_LATENCY_MS_DEGRADED:
-        issues.append(f"latency {lat:.0f} ms elevated")
+    for (_, scale, crit, crit_sev, crit_msg, deg, deg_sev, deg_msg), v in zip(_HEALTH_RULES, readings):
+        x = v * scale
+        if x > crit:
+            issues.append(crit_msg.format(v=v, t=crit / scale))
+            severity = _bump(severity, crit_sev)
+        elif x > deg:
+            issues.append(deg_msg.format(v=v, t=deg / scale))
+            severity = _bump(severity, deg_sev)
 
     if chaos:
         issues.append(f"active chaos: {', '.join(chaos)}")
@@ -103,6 +231,7 @@ def classify_demo_health(health: dict) -> Optional[dict]:
     if not issues:
         return None
 
+    mem, cpu, err, lat = readings
     return {
         "severity":    severity,
         "issues":      issues,
@@ -110,7 +239,7 @@ def classify_demo_health(health: dict) -> Optional[dict]:
         "metrics": {
             "memory_usage_mb": mem,
             "cpu_percent":     cpu,
-            "error_rate":      err_frac,
+            "error_rate":      err / 100.0,
             "avg_latency_ms":  lat,
             "status":          status,
         },
@@ -130,25 +259,51 @@ MOCK_SERVICES = [
 # ─── Incident Scenarios ───────────────────────────────────────────────────────
 # Each scenario includes realistic mock logs with timestamps, trace IDs,
 # stack traces, and service names — exactly as they'd appear in production.
-
-ANOMALY_SCENARIOS = [
+# Scenarios are immutable: metrics are read-only and full_metrics (metrics
+# plus mock_logs, as embedded in the incident snapshot) is built once here.
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    type: str
+    title: str
+    description: str
+    severity: IncidentSeverity
+    service: str
+    affected_users: int
+    error_count: int
+    metrics: Mapping[str, Any]
+    mock_logs: str
+    full_metrics: Mapping[str, Any]
+
+
+def _scenario(*, metrics: dict, mock_logs: str = "", **fields) -> Scenario:
+    full_metrics = {**metrics, "mock_logs": mock_logs} if mock_logs else metrics
+    return Scenario(
+        metrics=MappingProxyType(metrics),
+        mock_logs=mock_logs,
+        full_metrics=MappingProxyType(full_metrics),
+        **fields,
+    )
+
+
+ANOMALY_SCENARIOS: tuple[Scenario, ...] = (
     # ── 1. CPU Spike / N+1 queries ────────────────────────────────────────────
-    {
-        "type": "cpu_spike",
-        "title": "CPU Saturation — Payment Service",
-        "description": "CPU usage exceeding 97% threshold for 5 consecutive minutes. Request queue depth growing.",
-        "severity": IncidentSeverity.CRITICAL,
-        "service": "payment-service",
-        "affected_users": 1250,
-        "error_count": 342,
-        "metrics": {
+    _scenario(
+        type="cpu_spike",
+        title="CPU Saturation — Payment Service",
+        description="CPU usage exceeding 97% threshold for 5 consecutive minutes. Request queue depth growing.",
+        severity=IncidentSeverity.CRITICAL,
+        service="payment-service",
+        affected_users=1250,
+        error_count=342,
+        metrics={
             "cpu_percent": 97.3,
             "memory_percent": 68.0,
             "error_rate": 0.12,
             "latency_p99_ms": 8200,
             "request_rate": 4850,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:09.112Z INFO  [payment-service] [trace=8f3a2b1c] GET /api/v2/orders/process started\n"
             "2024-01-15T14:23:09.118Z DEBUG [payment-service] [trace=8f3a2b1c] ORM query: SELECT * FROM orders WHERE user_id='usr_4421' (1/847)\n"
             "2024-01-15T14:23:09.245Z DEBUG [payment-service] [trace=8f3a2b1c] ORM query: SELECT * FROM order_items WHERE order_id='ord_1001' (2/847)\n"
@@ -162,25 +317,25 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:11.890Z ERROR [k8s/payment-service] HPA: scaling event triggered (cpu=97.3% > 70%)\n"
             "2024-01-15T14:23:12.100Z INFO  [payment-service] Active connections: 284/300 (94.7% pool utilization)"
         ),
-    },
+    ),
 
     # ── 2. Memory Leak ────────────────────────────────────────────────────────
-    {
-        "type": "memory_leak",
-        "title": "Memory Leak — Auth Service Heap Growth",
-        "description": "Auth service heap growing unbounded at ~50MB/hour. OOMKill imminent in ~10 minutes.",
-        "severity": IncidentSeverity.HIGH,
-        "service": "auth-service",
-        "affected_users": 430,
-        "error_count": 87,
-        "metrics": {
+    _scenario(
+        type="memory_leak",
+        title="Memory Leak — Auth Service Heap Growth",
+        description="Auth service heap growing unbounded at ~50MB/hour. OOMKill imminent in ~10 minutes.",
+        severity=IncidentSeverity.HIGH,
+        service="auth-service",
+        affected_users=430,
+        error_count=87,
+        metrics={
             "cpu_percent": 45.0,
             "memory_percent": 91.5,
             "error_rate": 0.08,
             "latency_p99_ms": 1200,
             "request_rate": 1200,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:14.001Z INFO  [auth-service] Heap snapshot: used=7.3GB/8GB (91.5%)\n"
             "2024-01-15T14:23:14.220Z WARN  [auth-service] MaxListenersExceededWarning: Possible EventEmitter memory leak detected. 11 sessionUpdate listeners added to [WebSocketServer]. Use emitter.setMaxListeners() to increase limit\n"
             "2024-01-15T14:23:14.445Z WARN  [auth-service] GC pressure HIGH: 12 major collections in last 60s (normal: <3)\n"
@@ -193,25 +348,25 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:15.891Z INFO  [auth-service] Listener counts: sessionUpdate=11, tokenRefresh=9, disconnect=8\n"
             "2024-01-15T14:23:16.100Z CRIT  [k8s/auth-service] Pod auth-service-6f7b9d-qw3rt: memory=7.3GB/8GB limit — OOMKill predicted in ~10min"
         ),
-    },
+    ),
 
     # ── 3. High Error Rate / Circuit Breaker ──────────────────────────────────
-    {
-        "type": "high_error_rate",
-        "title": "Circuit Breaker Open — API Gateway 502 Spike",
-        "description": "API Gateway error rate spiked to 38% (threshold: 5%). Redis ECONNREFUSED cascading to all endpoints.",
-        "severity": IncidentSeverity.HIGH,
-        "service": "api-gateway",
-        "affected_users": 890,
-        "error_count": 2341,
-        "metrics": {
+    _scenario(
+        type="high_error_rate",
+        title="Circuit Breaker Open — API Gateway 502 Spike",
+        description="API Gateway error rate spiked to 38% (threshold: 5%). Redis ECONNREFUSED cascading to all endpoints.",
+        severity=IncidentSeverity.HIGH,
+        service="api-gateway",
+        affected_users=890,
+        error_count=2341,
+        metrics={
             "cpu_percent": 62.0,
             "memory_percent": 55.0,
             "error_rate": 0.38,
             "latency_p99_ms": 5100,
             "request_rate": 3200,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:18.001Z ERROR [api-gateway] [trace=9c4e7f2a] Redis connection refused: connect ECONNREFUSED 10.0.1.45:6379\n"
             "2024-01-15T14:23:18.045Z ERROR [api-gateway] [trace=9c4e7f2b] Redis connection refused: connect ECONNREFUSED 10.0.1.45:6379\n"
             "2024-01-15T14:23:18.102Z WARN  [api-gateway] Circuit breaker [redis-cache]: failure_count=10/10 — OPENING\n"
@@ -223,25 +378,25 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:19.334Z ERROR [api-gateway] SLA breach: error_rate=38% (SLA limit: 0.1%)\n"
             "2024-01-15T14:23:19.556Z WARN  [pagerduty] High severity alert fired: API-GW-502-SPIKE (consecutive_failures=23)"
         ),
-    },
+    ),
 
     # ── 4. Database Latency / Missing Index ───────────────────────────────────
-    {
-        "type": "latency_spike",
-        "title": "P99 Latency 12s — Missing DB Index (Recommendations)",
-        "description": "P99 latency spiked from 180ms to 12.5s. PostgreSQL sequential scan on 12.4M-row table.",
-        "severity": IncidentSeverity.MEDIUM,
-        "service": "recommendation-service",
-        "affected_users": 320,
-        "error_count": 45,
-        "metrics": {
+    _scenario(
+        type="latency_spike",
+        title="P99 Latency 12s — Missing DB Index (Recommendations)",
+        description="P99 latency spiked from 180ms to 12.5s. PostgreSQL sequential scan on 12.4M-row table.",
+        severity=IncidentSeverity.MEDIUM,
+        service="recommendation-service",
+        affected_users=320,
+        error_count=45,
+        metrics={
             "cpu_percent": 78.0,
             "memory_percent": 70.0,
             "error_rate": 0.15,
             "latency_p99_ms": 12500,
             "request_rate": 950,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:21.001Z SLOW [recommendation-db] query_duration=11823ms threshold=2000ms\n"
             "  Query: SELECT r.*, u.preferences FROM recommendations r JOIN users u ON r.user_id=u.id WHERE r.user_id='usr_8821' ORDER BY r.score DESC LIMIT 20\n"
             "  Plan: Seq Scan on recommendations (cost=0.00..234891.23 rows=12450000 width=156)\n"
@@ -254,25 +409,25 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:22.891Z INFO  [postgresql] Table bloat: recommendations = 12,450,123 rows, last VACUUM: 14 days ago\n"
             "2024-01-15T14:23:23.100Z WARN  [postgresql] Missing index detected by pg_stat_user_tables: seq_scan=8,432 (today)"
         ),
-    },
+    ),
 
     # ── 5. Connection Pool Exhausted ──────────────────────────────────────────
-    {
-        "type": "connection_pool_exhausted",
-        "title": "DB Connection Pool Exhausted — User Service",
-        "description": "PostgreSQL connection pool at 100% capacity. Queries queuing, deadlock detected in payment processing.",
-        "severity": IncidentSeverity.HIGH,
-        "service": "user-service",
-        "affected_users": 890,
-        "error_count": 156,
-        "metrics": {
+    _scenario(
+        type="connection_pool_exhausted",
+        title="DB Connection Pool Exhausted — User Service",
+        description="PostgreSQL connection pool at 100% capacity. Queries queuing, deadlock detected in payment processing.",
+        severity=IncidentSeverity.HIGH,
+        service="user-service",
+        affected_users=890,
+        error_count=156,
+        metrics={
             "cpu_percent": 55.0,
             "memory_percent": 80.0,
             "error_rate": 0.22,
             "db_connections": 100,
             "latency_p99_ms": 6400,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:25.001Z ERROR [user-service] [trace=3a7c9f2e] FATAL: remaining connection slots are reserved for non-replication superuser connections\n"
             "2024-01-15T14:23:25.112Z ERROR [postgresql] max_connections=100 active_connections=100 (100%)\n"
             "2024-01-15T14:23:25.334Z WARN  [user-service] Connection pool: timed out waiting for connection (30000ms)\n"
@@ -286,18 +441,18 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:26.100Z INFO  [user-service] Pool stats: size=20 active=20 idle=0 waiting=34\n"
             "2024-01-15T14:23:26.334Z WARN  [postgresql] pg_locks: 8 deadlock candidates detected"
         ),
-    },
+    ),
 
     # ── 6. Kubernetes CrashLoopBackOff / OOMKilled ────────────────────────────
-    {
-        "type": "k8s_crashloop",
-        "title": "CrashLoopBackOff — API Gateway OOMKilled (exit 137)",
-        "description": "API Gateway pod in CrashLoopBackOff. OOMKilled 8 times in 20 minutes. Memory limit 512Mi insufficient.",
-        "severity": IncidentSeverity.CRITICAL,
-        "service": "api-gateway",
-        "affected_users": 3200,
-        "error_count": 890,
-        "metrics": {
+    _scenario(
+        type="k8s_crashloop",
+        title="CrashLoopBackOff — API Gateway OOMKilled (exit 137)",
+        description="API Gateway pod in CrashLoopBackOff. OOMKilled 8 times in 20 minutes. Memory limit 512Mi insufficient.",
+        severity=IncidentSeverity.CRITICAL,
+        service="api-gateway",
+        affected_users=3200,
+        error_count=890,
+        metrics={
             "cpu_percent": 42.0,
             "memory_percent": 99.8,
             "error_rate": 0.45,
@@ -305,7 +460,7 @@ ANOMALY_SCENARIOS = [
             "restart_count": 8,
             "last_exit_code": 137,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:21:03.001Z INFO  [k8s] Pod api-gateway-7d9f8b-xkp2q started (restart #8)\n"
             "2024-01-15T14:21:45.334Z WARN  [api-gateway] Memory usage: 498Mi/512Mi (97.3%)\n"
             "2024-01-15T14:21:58.556Z WARN  [api-gateway] Response buffer accumulation: 42 large responses buffered (>1MB each)\n"
@@ -320,25 +475,25 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:18.112Z WARN  [k8s] Deployment api-gateway: Available=1/3 Ready=1/3 (SLA breach)\n"
             "2024-01-15T14:23:18.334Z INFO  [k8s] Events: 8× OOMKilled in 20min — memory limit=512Mi insufficient for workload"
         ),
-    },
+    ),
 
     # ── 7. API Gateway 502 Spike / Upstream Timeout ───────────────────────────
-    {
-        "type": "api_gateway_502",
-        "title": "502 Bad Gateway Spike — Upstream Service Timeout",
-        "description": "API Gateway returning 502 for 35% of requests. Upstream order-service timeouts cascading.",
-        "severity": IncidentSeverity.HIGH,
-        "service": "api-gateway",
-        "affected_users": 1800,
-        "error_count": 4230,
-        "metrics": {
+    _scenario(
+        type="api_gateway_502",
+        title="502 Bad Gateway Spike — Upstream Service Timeout",
+        description="API Gateway returning 502 for 35% of requests. Upstream order-service timeouts cascading.",
+        severity=IncidentSeverity.HIGH,
+        service="api-gateway",
+        affected_users=1800,
+        error_count=4230,
+        metrics={
             "cpu_percent": 58.0,
             "memory_percent": 62.0,
             "error_rate": 0.35,
             "latency_p99_ms": 30000,
             "request_rate": 2800,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:30.001Z ERROR [api-gateway] [trace=6e2a9d4c] upstream timed out (30000ms) while reading response header from upstream, upstream: http://order-service:8080\n"
             "2024-01-15T14:23:30.112Z ERROR [api-gateway] [trace=6e2a9d4d] 502 Bad Gateway: order-service health check failing\n"
             "2024-01-15T14:23:30.334Z WARN  [api-gateway] Upstream: order-service — consecutive_failures=15 (circuit_breaker: HALF_OPEN)\n"
@@ -351,18 +506,18 @@ ANOMALY_SCENARIOS = [
             "2024-01-15T14:23:31.445Z ERROR [api-gateway] SLA breach: availability=64.8% (SLA: 99.9%)\n"
             "2024-01-15T14:23:31.667Z CRIT  [pagerduty] P1 incident: API-GW-502-CASCADE — all order endpoints affected"
         ),
-    },
+    ),
 
     # ── 8. Database Replication Lag ───────────────────────────────────────────
-    {
-        "type": "db_replication_lag",
-        "title": "PostgreSQL Replication Lag Critical — 47s Behind Primary",
-        "description": "Read replica replication lag at 47 seconds (threshold: 5s). Read queries serving stale data.",
-        "severity": IncidentSeverity.HIGH,
-        "service": "order-service",
-        "affected_users": 560,
-        "error_count": 234,
-        "metrics": {
+    _scenario(
+        type="db_replication_lag",
+        title="PostgreSQL Replication Lag Critical — 47s Behind Primary",
+        description="Read replica replication lag at 47 seconds (threshold: 5s). Read queries serving stale data.",
+        severity=IncidentSeverity.HIGH,
+        service="order-service",
+        affected_users=560,
+        error_count=234,
+        metrics={
             "cpu_percent": 82.0,
             "memory_percent": 74.0,
             "error_rate": 0.18,
@@ -370,7 +525,7 @@ ANOMALY_SCENARIOS = [
             "replication_lag_s": 47,
             "db_connections": 78,
         },
-        "mock_logs": (
+        mock_logs=(
             "2024-01-15T14:23:35.001Z WARN  [postgresql-replica] pg_stat_replication: replay_lag=47s (threshold=5s)\n"
             "  Primary LSN: 0/8A3F2190\n"
             "  Replica LSN: 0/8A3B9440\n"
@@ -386,8 +541,53 @@ ANOMALY_SCENARIOS = [
             "  VACUUM on orders table: running for 180s, blocking 4,083,024 bytes of WAL replay\n"
             "2024-01-15T14:23:36.445Z CRIT  [monitoring] replication_lag_alert: lag=47s SLA=5s — failover risk HIGH"
         ),
-    },
-]
+    ),
+)
+
+# "Anomaly Detected" timeline details; filled with str.format_map per incident
+_ALERT_DETAILS_TEMPLATE = (
+    "Azure Monitor alert fired: {description}. "
+    "Metrics — CPU: {cpu_percent}%, "
+    "Memory: {memory_percent}%, "
+    "ErrorRate: {error_rate}, "
+    "P99: {latency_p99_ms}ms"
+)
+# Placeholders for metrics a snapshot doesn't carry
+_ALERT_METRIC_DEFAULTS = dict.fromkeys(
+    ("cpu_percent", "memory_percent", "error_rate", "latency_p99_ms"), "N/A"
+)
+
+
+# Simulated incidents are fully determined by their scenario, so the Incident
+# fields and the timeline details are built once per scenario at import
+_SIMULATION_TEMPLATES = tuple(
+    (
+        MappingProxyType({
+            "title":            sc.title,
+            "description":      sc.description,
+            "severity":         sc.severity,
+            "service":          sc.service,
+            "metrics_snapshot": sc.full_metrics,
+            "error_count":      sc.error_count,
+            "affected_users":   sc.affected_users,
+        }),
+        _ALERT_DETAILS_TEMPLATE.format_map(
+            {**_ALERT_METRIC_DEFAULTS, **sc.metrics, "description": sc.description}
+        ),
+    )
+    for sc in ANOMALY_SCENARIOS
+)
+
+
+def _shuffle_bag(items: tuple):
+    """Endless picks from items: every item once per pass, each pass reshuffled."""
+    bag = list(items)
+    while True:
+        _rng.shuffle(bag)
+        yield from bag
+
+
+_simulation_picks = _shuffle_bag(_SIMULATION_TEMPLATES)
 
 
 class MonitorAgent:
@@ -402,7 +602,7 @@ class MonitorAgent:
         self.status.status = "working"
         self.status.current_task = task
         self.status.last_action = task
-        self.status.last_action_time = datetime.utcnow()
+        self.status.last_action_time_ns = time.monotonic_ns()
 
     def _set_idle(self):
         self.status.status = "idle"
@@ -413,60 +613,64 @@ class MonitorAgent:
     async def check_pipeline_status(self) -> dict:
         """Check Azure Monitor pipeline status across all services."""
         self._set_working("Checking pipeline status")
-        await asyncio.sleep(0.5)
+        await simulated_latency(0.5)
+
+        # Services are independent — fetch them concurrently, bounded so a
+        # larger fleet cannot flood Azure Monitor with simultaneous queries
+        sem = asyncio.Semaphore(settings.MONITOR_MAX_CONCURRENCY)
+        # One clock read per check; every service's last_deploy is relative to it
+        now = datetime.utcnow()
+
+        async def bounded(service: str) -> dict:
+            async with sem:
+                return await self._fetch_service_pipeline(service, now)
 
         pipeline_data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "pipelines": [],
+            "timestamp": now.isoformat(),
+            "pipelines": await asyncio.gather(*(bounded(s) for s in MOCK_SERVICES)),
         }
 
-        for service in MOCK_SERVICES:
-            cpu = random.uniform(10, 99)
-            memory = random.uniform(20, 95)
-            error_rate = random.uniform(0, 0.5)
-            latency = random.uniform(50, 15000)
-
-            pipeline_data["pipelines"].append({
-                "service": service,
-                "status": "healthy" if cpu < 80 and error_rate < 0.1 else "degraded",
-                "cpu_percent": round(cpu, 1),
-                "memory_percent": round(memory, 1),
-                "error_rate": round(error_rate, 3),
-                "latency_p99_ms": round(latency, 0),
-                "last_deploy": (
-                    datetime.utcnow() - timedelta(hours=random.randint(1, 72))
-                ).isoformat(),
-            })
-
-        logger.info(f"MonitorAgent: Checked {len(pipeline_data['pipelines'])} pipelines")
+        logger.info("MonitorAgent: Checked %d pipelines", len(pipeline_data["pipelines"]))
         return pipeline_data
 
+    async def _fetch_service_pipeline(self, service: str, now: datetime) -> dict:
+        """Current pipeline metrics for one service (simulated Azure Monitor query)."""
+        cpu, memory, error_rate, latency, deploy_age_h = _draw_floats(_PIPELINE_METRIC_BOUNDS)
+
+        return {
+            "service": service,
+            "status": "healthy" if cpu < 80 and error_rate < 0.1 else "degraded",
+            "cpu_percent": round(cpu, 1),
+            "memory_percent": round(memory, 1),
+            "error_rate": round(error_rate, 3),
+            "latency_p99_ms": round(latency, 0),
+            "last_deploy": (now - timedelta(hours=int(deploy_age_h))).isoformat(),
+        }
+
     async def analyze_metrics(self, pipeline_data: dict) -> Optional[dict]:
         """Detect anomalies in the collected metrics."""
         self._set_working("Analyzing metrics for anomalies")
-        await asyncio.sleep(0.3)
+        await simulated_latency(0.3)
 
         anomalies = []
-        for pipeline in pipeline_data.get("pipelines", []):
-            issues = []
-            if pipeline["cpu_percent"] > 90:
-                issues.append(f"CPU at {pipeline['cpu_percent']}%")
-            if pipeline["memory_percent"] > 88:
-                issues.append(f"Memory at {pipeline['memory_percent']}%")
-            if pipeline["error_rate"] > 0.2:
-                issues.append(f"Error rate at {pipeline['error_rate'] * 100:.1f}%")
-            if pipeline.get("latency_p99_ms", 0) > 5000:
-                issues.append(f"P99 latency at {pipeline['latency_p99_ms']}ms")
-
-            if issues:
-                anomalies.append({
-                    "service": pipeline["service"],
-                    "issues": issues,
-                    "metrics": pipeline,
-                })
+        pipelines = pipeline_data.get("pipelines", [])
+        for pipeline in pipelines:
+            get = pipeline.get
+            issues = [
+                msg.format(v=v)
+                for key, limit, msg in _PIPELINE_RULES
+                if (v := get(key, 0)) > limit
+            ]
+            if not issues:
+                continue
+            anomalies.append({
+                "service": pipeline["service"],
+                "issues": issues,
+                "metrics": pipeline,
+            })
 
         if anomalies:
-            logger.warning(f"MonitorAgent: Detected {len(anomalies)} anomalies")
+            logger.warning("MonitorAgent: Detected %d anomalies", len(anomalies))
             return {"anomalies": anomalies, "count": len(anomalies)}
 
         return None
@@ -476,7 +680,7 @@ class MonitorAgent:
         service: str,
         description: str,
         severity: IncidentSeverity,
-        metrics: dict,
+        metrics: Mapping,
         title: str = "",
         affected_users: int = 0,
         error_count: int = 0,
@@ -484,21 +688,13 @@ class MonitorAgent:
     ) -> Incident:
         """Create a structured incident from detected anomaly."""
         self._set_working(f"Creating incident for {service}")
-        await asyncio.sleep(0.2)
+        await simulated_latency(0.2)
 
-        sev_prefix = {
-            IncidentSeverity.CRITICAL: "[CRITICAL]",
-            IncidentSeverity.HIGH: "[HIGH]",
-            IncidentSeverity.MEDIUM: "[MEDIUM]",
-            IncidentSeverity.LOW: "[LOW]",
-        }
-        incident_title = title or f"{sev_prefix[severity]} {service} — {description[:50]}"
+        incident_title = title or f"{_SEV_PREFIX[severity]} {service} — {description[:50]}"
 
         # Embed mock_logs into metrics_snapshot so DiagnosticAgent can include
-        # them in the GPT-4o context
-        full_metrics = dict(metrics)
-        if mock_logs:
-            full_metrics["mock_logs"] = mock_logs
+        # them in the GPT-4o context (Incident copies the mapping on validation)
+        full_metrics = {**metrics, "mock_logs": mock_logs} if mock_logs else metrics
 
         incident = Incident(
             title=incident_title,
@@ -506,74 +702,62 @@ class MonitorAgent:
             severity=severity,
             service=service,
             metrics_snapshot=full_metrics,
-            error_count=error_count or int(metrics.get("error_rate", 0.1) * random.randint(500, 5000)),
+            error_count=error_count or int(metrics.get("error_rate", 0.1) * _pooled_randint(500, 5000)),
             affected_users=affected_users or (
-                random.randint(200, 2000) if severity in [IncidentSeverity.CRITICAL, IncidentSeverity.HIGH]
-                else random.randint(10, 200)
+                _pooled_randint(200, 2000) if severity in [IncidentSeverity.CRITICAL, IncidentSeverity.HIGH]
+                else _pooled_randint(10, 200)
             ),
         )
 
+        details = _ALERT_DETAILS_TEMPLATE.format_map(
+            {**_ALERT_METRIC_DEFAULTS, **metrics, "description": description}
+        )
+        return self._open_incident(incident, details)
+
+    def _open_incident(self, incident: Incident, details: str) -> Incident:
+        """Stamp the Anomaly Detected event on a new incident and record it."""
         incident.add_timeline_event(
             agent=self.name,
             action="Anomaly Detected",
-            details=(
-                f"Azure Monitor alert fired: {description}. "
-                f"Metrics — CPU: {metrics.get('cpu_percent', 'N/A')}%, "
-                f"Memory: {metrics.get('memory_percent', 'N/A')}%, "
-                f"ErrorRate: {metrics.get('error_rate', 'N/A')}, "
-                f"P99: {metrics.get('latency_p99_ms', 'N/A')}ms"
-            ),
+            details=details,
             status="warning",
         )
 
         self.status.incidents_handled += 1
         self._set_idle()
-        logger.info(f"MonitorAgent: Created incident {incident.id} for {service}")
+        logger.info("MonitorAgent: Created incident %s for %s", incident.id, incident.service)
         return incident
 
     async def run_simulation(self) -> Incident:
         """Run a full simulated monitoring cycle and return an incident."""
-        scenario = random.choice(ANOMALY_SCENARIOS)
-        return await self.create_incident(
-            service=scenario.get("service", random.choice(MOCK_SERVICES)),
-            title=scenario.get("title", ""),
-            description=scenario["description"],
-            severity=scenario["severity"],
-            metrics=scenario["metrics"],
-            affected_users=scenario.get("affected_users", 0),
-            error_count=scenario.get("error_count", 0),
-            mock_logs=scenario.get("mock_logs", ""),
-        )
+        fields, details = next(_simulation_picks)
+        self._set_working(f"Creating incident for {fields['service']}")
+        await simulated_latency(0.2)
+        return self._open_incident(Incident(**fields), details)
 
     async def create_demo_incident(self, health: dict, anomaly: dict) -> Incident:
         """Create an incident from a real demo-app health anomaly."""
-        chaos = anomaly.get("chaos", [])
+        _, _, err, _, _, status, request_count = _HEALTH_FIELDS({**_HEALTH_DEFAULTS, **health})
+        chaos = anomaly["chaos"]
         chaos_str = f" Chaos active: {', '.join(chaos)}." if chaos else ""
         description = (
             f"ShopDemo anomaly detected: {'; '.join(anomaly['issues'])}.{chaos_str} "
-            f"Status: {health.get('status', 'unknown')}."
+            f"Status: {status}."
         )
-        title_prefix = {
-            IncidentSeverity.CRITICAL: "[CRITICAL]",
-            IncidentSeverity.HIGH:     "[HIGH]",
-            IncidentSeverity.MEDIUM:   "[MEDIUM]",
-            IncidentSeverity.LOW:      "[LOW]",
-        }[anomaly["severity"]]
+        title_prefix = _SEV_PREFIX[anomaly["severity"]]
 
         chaos_type = chaos[0].replace("_active", "") if chaos else "anomaly"
         title = f"{title_prefix} ShopDemo — {chaos_type.replace('_', ' ').title()} detected"
 
-        metrics = dict(anomaly["metrics"])
-        metrics["active_chaos"] = chaos
-
         return await self.create_incident(
             service="shopdemo",
             title=title,
             description=description,
             severity=anomaly["severity"],
-            metrics=metrics,
+            # Layered view; Incident flattens it into its own snapshot dict
+            metrics=ChainMap({"active_chaos": chaos}, anomaly["metrics"]),
             affected_users=0,
-            error_count=int(health.get("request_count", 0) * health.get("error_rate", 0) / 100),
+            error_count=int(request_count * err / 100),
         )
 
     async def background_poll(
@@ -587,67 +771,87 @@ class MonitorAgent:
         Runs as a background asyncio task (started in main.py lifespan).
         """
         from api.websocket import manager as ws_manager
+        # Imported here because agents.orchestrator imports this module
+        from agents.orchestrator import OrchestratorAgent
 
         logger.info(
-            f"[MONITOR] Background polling started — "
-            f"interval={settings.MONITORING_INTERVAL_SECONDS}s "
-            f"target={settings.DEMO_APP_URL}"
+            "[MONITOR] Background polling started — interval=%ss target=%s",
+            settings.MONITORING_INTERVAL_SECONDS,
+            settings.DEMO_APP_URL,
         )
+        # One orchestrator for every incident this poller raises; each
+        # handle_incident run opens its own MCP client and plan
+        orch = OrchestratorAgent(incidents_db=incidents_db, agent_statuses=agent_statuses)
         _last_incident_id: Optional[str] = None
+        _last_broadcast: Optional[tuple] = None
+        _quiet_polls = 0
+
+        # Polls run on a fixed monotonic schedule, so time spent polling and
+        # handling an anomaly doesn't stretch the effective interval
+        loop = asyncio.get_running_loop()
+        interval = settings.MONITORING_INTERVAL_SECONDS
+        next_tick = loop.time()
 
         while not stop_event.is_set():
+            next_tick += interval
             try:
                 health = await poll_demo_app()
                 if health:
-                    # Broadcast live metrics to dashboard
-                    await ws_manager.broadcast_event(
-                        event_type="demo_app_metrics",
-                        data={
-                            "status":          health.get("status"),
-                            "memory_usage_mb": health.get("memory_usage_mb"),
-                            "cpu_percent":     health.get("cpu_percent"),
-                            "error_rate":      health.get("error_rate"),
-                            "avg_latency_ms":  health.get("avg_latency_ms"),
-                            "active_chaos":    health.get("active_chaos", []),
-                            "request_count":   health.get("request_count"),
-                            "polled_at":       health.get("_polled_at"),
-                        },
-                    )
-
-                    anomaly = classify_demo_health(health)
-                    if anomaly and _last_incident_id is None:
+                    healthy = health.get("status") == "healthy"
+                    # A steady healthy app only re-broadcasts as a periodic
+                    # heartbeat; any change or non-healthy reading goes out now
+                    key = _broadcast_key(health)
+                    if not healthy or key != _last_broadcast or _quiet_polls >= _HEARTBEAT_POLLS:
+                        await ws_manager.broadcast_event(
+                            event_type="demo_app_metrics",
+                            data={
+                                "status":          health.get("status"),
+                                "memory_usage_mb": health.get("memory_usage_mb"),
+                                "cpu_percent":     health.get("cpu_percent"),
+                                "error_rate":      health.get("error_rate"),
+                                "avg_latency_ms":  health.get("avg_latency_ms"),
+                                "active_chaos":    health.get("active_chaos", []),
+                                "request_count":   health.get("request_count"),
+                                "polled_at":       health.get("_polled_at"),
+                            },
+                        )
+                        _last_broadcast = key
+                        _quiet_polls = 0
+                    else:
+                        _quiet_polls += 1
+
+                    if healthy:
+                        # Nothing to classify; reset so the next anomaly
+                        # creates a fresh incident
+                        _last_incident_id = None
+                    elif (anomaly := classify_demo_health(health)) and _last_incident_id is None:
                         # Create incident and hand off to orchestrator
                         incident = await self.create_demo_incident(health, anomaly)
                         incidents_db[incident.id] = incident
                         _last_incident_id = incident.id
                         logger.warning(
-                            f"[MONITOR] New demo-app incident {incident.id}: "
-                            f"{'; '.join(anomaly['issues'])}"
+                            "[MONITOR] New demo-app incident %s: %s",
+                            incident.id,
+                            "; ".join(anomaly["issues"]),
                         )
 
                         # Trigger orchestrator pipeline
                         try:
-                            from agents.orchestrator import OrchestratorAgent
-                            orch = OrchestratorAgent(
-                                incidents_db=incidents_db,
-                                agent_statuses=agent_statuses,
-                            )
                             asyncio.create_task(orch.handle_incident(incident))
                         except Exception as orch_err:
-                            logger.error(f"[MONITOR] Orchestrator launch failed: {orch_err}")
-
-                    elif health.get("status") == "healthy":
-                        # Reset so the next anomaly creates a fresh incident
-                        _last_incident_id = None
+                            logger.error("[MONITOR] Orchestrator launch failed: %s", orch_err)
 
             except Exception as poll_err:
-                logger.error(f"[MONITOR] Poll loop error: {poll_err}", exc_info=True)
+                logger.error("[MONITOR] Poll loop error: %s", poll_err, exc_info=True)
 
+            now = loop.time()
+            if next_tick < now:
+                # Overran a whole interval — poll again now rather than
+                # bursting to catch up on missed ticks
+                next_tick = now
             try:
-                await asyncio.wait_for(
-                    asyncio.shield(stop_event.wait()),
-                    timeout=settings.MONITORING_INTERVAL_SECONDS,
-                )
+                # Wakes immediately on shutdown instead of finishing the wait
+                await asyncio.wait_for(stop_event.wait(), timeout=next_tick - now)
             except asyncio.TimeoutError:
                 pass  # normal — just time for next poll
 
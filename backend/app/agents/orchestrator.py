@@ -65,7 +65,6 @@ class OrchestratorAgent:
 
         # Framework components
         self._mcp_server = get_mcp_server()
-        self._mcp = MCPClient(caller_name="orchestrator", server=self._mcp_server)
         self._registry = get_agent_registry()
         self._planner = TaskPlanner(confidence_threshold=self._threshold)
 
@@ -141,6 +140,8 @@ class OrchestratorAgent:
         incident = self.incidents_db.get(incident_id)
         if not incident or not incident.fix:
             return {"success": False, "error": "Incident or fix not found"}
+        # Deploying merges the fix PR, which generate_fix opens in the background
+        await self.fixer.wait_for_pull_request(incident_id)
         result = await self.deploy.deploy_fix(incident, incident.fix)
         return result
 
@@ -229,6 +230,9 @@ class OrchestratorAgent:
         # ── Create and broadcast the execution plan ───────────────────────────
         plan: ExecutionPlan = self._planner.create_plan(incident)
         plan.correlation_id = corr_id
+        # One client per run so call_count reports this incident's MCP calls
+        # only, even when several incidents share this orchestrator
+        mcp = MCPClient(caller_name="orchestrator", server=self._mcp_server)
         await self._planner._broadcast_plan(plan)
 
         await self._broadcast(
@@ -255,7 +259,7 @@ class OrchestratorAgent:
             await self._planner.start_step(plan, 1)
             self._registry.update_status("monitor", "working", "Collecting metrics")
 
-            mcp_r = await self._mcp.call_tool(
+            mcp_r = await mcp.call_tool(
                 "monitor.get_metrics",
                 {"service": incident.service, "window_minutes": 15},
                 correlation_id=corr_id, incident_id=incident.id,
@@ -282,7 +286,7 @@ class OrchestratorAgent:
             await self._planner.start_step(plan, 2)
             self._registry.update_status("diagnostic", "working", f"Analyzing {incident.id}")
 
-            mcp_r = await self._mcp.call_tool(
+            mcp_r = await mcp.call_tool(
                 "diagnostic.analyze_incident",
                 {"incident_id": incident.id, "service": incident.service,
                  "description": incident.description},
@@ -341,7 +345,7 @@ class OrchestratorAgent:
             await self._planner.start_step(plan, 4)
             self._registry.update_status("fixer", "working", f"Generating fix {incident.id}")
 
-            mcp_r = await self._mcp.call_tool(
+            mcp_r = await mcp.call_tool(
                 "fixer.generate_patch",
                 {"incident_id": incident.id, "service": incident.service,
                  "root_cause": diagnosis.root_cause if diagnosis else "",
@@ -363,7 +367,8 @@ class OrchestratorAgent:
 
             await self._broadcast(
                 "fixer", "Fix Generated via MCP",
-                f"PR #{fix.pr_number}: '{fix.description}'. File: {fix.file_path}. ({s4_ms}ms)",
+                f"PR #{fix.pr_number or 'pending'}: '{fix.description}'. "
+                f"File: {fix.file_path}. ({s4_ms}ms)",
                 incident.id, elapsed_ms=s4_ms,
             )
 
@@ -382,7 +387,7 @@ class OrchestratorAgent:
             s5_start = datetime.utcnow()
             await self._planner.start_step(plan, 5)
 
-            mcp_r = await self._mcp.call_tool(
+            mcp_r = await mcp.call_tool(
                 "fixer.validate_fix",
                 {"fix_id": fix.fix_id, "file_path": fix.file_path},
                 correlation_id=corr_id, incident_id=incident.id,
@@ -426,7 +431,7 @@ class OrchestratorAgent:
                 )
                 self._registry.update_status("deploy", "idle")
                 await self._planner.complete_plan(plan, "failed", self._ms(pipeline_start))
-                self._log_completion(incident, pipeline_start, "ROLLED_BACK")
+                self._log_completion(incident, pipeline_start, "ROLLED_BACK", mcp.call_count)
                 return
 
             # Pre-deploy validation
@@ -443,11 +448,11 @@ class OrchestratorAgent:
                 )
                 self._registry.update_status("deploy", "idle")
                 await self._planner.complete_plan(plan, "failed", self._ms(pipeline_start))
-                self._log_completion(incident, pipeline_start, "ROLLED_BACK")
+                self._log_completion(incident, pipeline_start, "ROLLED_BACK", mcp.call_count)
                 return
 
             # Execute deployment via MCP
-            mcp_r = await self._mcp.call_tool(
+            mcp_r = await mcp.call_tool(
                 "deploy.execute_deployment",
                 {"incident_id": incident.id, "fix_id": fix.fix_id,
                  "service": incident.service, "strategy": "rolling"},
@@ -469,7 +474,7 @@ class OrchestratorAgent:
                 )
                 self._registry.update_status("deploy", "idle")
                 await self._planner.complete_plan(plan, "failed", self._ms(pipeline_start))
-                self._log_completion(incident, pipeline_start, "ROLLED_BACK")
+                self._log_completion(incident, pipeline_start, "ROLLED_BACK", mcp.call_count)
                 return
 
             await self._planner.complete_step(plan, 6, mcp_r, s6_ms)
@@ -479,7 +484,7 @@ class OrchestratorAgent:
                 "deploy", "Deployment Complete via MCP",
                 f"Rolling deployment ({s6_ms}ms). "
                 f"Version: {deploy_result.get('deployed_version', 'N/A')}. "
-                f"Total MCP calls: {self._mcp.call_count}.",
+                f"Total MCP calls: {mcp.call_count}.",
                 incident.id, elapsed_ms=s6_ms,
             )
 
@@ -500,7 +505,7 @@ class OrchestratorAgent:
                     incident.id,
                 )
             else:
-                mcp_r = await self._mcp.call_tool(
+                mcp_r = await mcp.call_tool(
                     "monitor.check_health",
                     {"service": incident.service, "include_metrics": True},
                     correlation_id=corr_id, incident_id=incident.id,
@@ -516,7 +521,7 @@ class OrchestratorAgent:
             await self._transition_state(
                 incident, IncidentStatus.RESOLVED,
                 f"Fix live. Version {deploy_result.get('deployed_version', 'N/A')}. "
-                f"MTTR: {total_ms / 1000:.1f}s. MCP calls: {self._mcp.call_count}.",
+                f"MTTR: {total_ms / 1000:.1f}s. MCP calls: {mcp.call_count}.",
                 elapsed_ms=total_ms,
             )
             incident.add_timeline_event(
@@ -525,7 +530,7 @@ class OrchestratorAgent:
                 details=(
                     f"Pipeline complete in {total_ms / 1000:.1f}s. "
                     f"{len(incident.timeline)} events. "
-                    f"{self._mcp.call_count} MCP calls. "
+                    f"{mcp.call_count} MCP calls. "
                     f"Fix: PR #{fix.pr_number}."
                 ),
                 status="success",
@@ -539,7 +544,7 @@ class OrchestratorAgent:
             )
             await self._planner.complete_plan(plan, "completed", total_ms)
             self._registry.update_status("orchestrator", "idle")
-            self._log_completion(incident, pipeline_start, "RESOLVED")
+            self._log_completion(incident, pipeline_start, "RESOLVED", mcp.call_count)
 
         except Exception as e:
             total_ms = self._ms(pipeline_start)
@@ -584,12 +589,14 @@ class OrchestratorAgent:
 
     # ── Completion logger ──────────────────────────────────────────────────────
 
-    def _log_completion(self, incident: Incident, start: datetime, outcome: str) -> None:
+    def _log_completion(
+        self, incident: Incident, start: datetime, outcome: str, mcp_calls: int
+    ) -> None:
         total_ms = self._ms(start)
         logger.info(
             f"[{incident.id}] ── {outcome} ──\n"
             f"  MTTR: {total_ms / 1000:.2f}s  |  "
             f"Events: {len(incident.timeline)}  |  "
-            f"MCP calls: {self._mcp.call_count}  |  "
+            f"MCP calls: {mcp_calls}  |  "
             f"Agents: {', '.join(incident.agents_involved)}"
         )
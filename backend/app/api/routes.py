@@ -4,12 +4,11 @@ from typing import List, Optional
 from datetime import datetime
 import random
 
-import httpx
-
 from config import get_settings
 from models.incident import Incident, IncidentSeverity, IncidentStatus
 from models.agent_messages import AgentStatus
 from api.websocket import manager
+from services.http_clients import get_demo_client
 
 router = APIRouter()
 settings = get_settings()
@@ -50,18 +49,14 @@ async def simulate_incident(
     idx = idx % len(ANOMALY_SCENARIOS)
     scenario = ANOMALY_SCENARIOS[idx]
 
-    metrics = dict(scenario["metrics"])
-    if scenario.get("mock_logs"):
-        metrics["mock_logs"] = scenario["mock_logs"]
-
     incident = Incident(
-        title=scenario.get("title", f"[{scenario['severity'].upper()}] {scenario['service']}"),
-        description=scenario["description"],
-        severity=scenario["severity"],
-        service=scenario.get("service", "unknown-service"),
-        error_count=scenario.get("error_count", random.randint(50, 500)),
-        affected_users=scenario.get("affected_users", random.randint(100, 2000)),
-        metrics_snapshot=metrics,
+        title=scenario.title,
+        description=scenario.description,
+        severity=scenario.severity,
+        service=scenario.service,
+        error_count=scenario.error_count,
+        affected_users=scenario.affected_users,
+        metrics_snapshot=scenario.full_metrics,
     )
 
     incidents_db[incident.id] = incident
@@ -251,9 +246,8 @@ async def stream_mcp_tool(
 async def demo_app_health():
     """Proxy /health from the real ShopDemo app."""
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(f"{settings.DEMO_APP_URL}/health")
-            return resp.json()
+        resp = await get_demo_client().get("/health")
+        return resp.json()
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"ShopDemo unreachable: {exc}")
 
@@ -262,10 +256,9 @@ async def demo_app_health():
 async def demo_app_metrics():
     """Proxy /metrics (Prometheus text) from the real ShopDemo app."""
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(f"{settings.DEMO_APP_URL}/metrics")
-            from fastapi.responses import PlainTextResponse
-            return PlainTextResponse(content=resp.text, status_code=resp.status_code)
+        resp = await get_demo_client().get("/metrics")
+        from fastapi.responses import PlainTextResponse
+        return PlainTextResponse(content=resp.text, status_code=resp.status_code)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"ShopDemo unreachable: {exc}")
 
@@ -274,9 +267,8 @@ async def demo_app_metrics():
 async def demo_app_chaos_status():
     """Proxy /chaos/status from the real ShopDemo app."""
     try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(f"{settings.DEMO_APP_URL}/chaos/status")
-            return resp.json()
+        resp = await get_demo_client().get("/chaos/status")
+        return resp.json()
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"ShopDemo unreachable: {exc}")
 
@@ -298,9 +290,8 @@ async def inject_chaos(experiment: str, background_tasks: BackgroundTasks):
 
     # 1. Inject chaos into ShopDemo
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(f"{settings.DEMO_APP_URL}/chaos/{experiment}")
-            chaos_result = resp.json() if resp.status_code == 200 else {"status": "error"}
+        resp = await get_demo_client().post(f"/chaos/{experiment}", timeout=10.0)
+        chaos_result = resp.json() if resp.status_code == 200 else {"status": "error"}
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"ShopDemo unreachable: {exc}")
 
@@ -343,9 +334,8 @@ async def inject_chaos(experiment: str, background_tasks: BackgroundTasks):
 async def stop_all_chaos():
     """Stop ALL active chaos experiments in the real ShopDemo app."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(f"{settings.DEMO_APP_URL}/chaos/stop")
-            return resp.json()
+        resp = await get_demo_client().post("/chaos/stop", timeout=10.0)
+        return resp.json()
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"ShopDemo unreachable: {exc}")
 
@@ -355,11 +345,13 @@ async def stop_all_chaos():
 @router.get("/monitoring/history")
 async def monitoring_history(limit: int = 60):
     """Return recent demo-app health readings collected by the background poller."""
-    from agents.monitor_agent import metric_history
+    from agents.monitor_agent import HISTORY_COLUMNS, metric_history, metric_trend
     readings = list(metric_history)[-limit:]
     return {
         "count":    len(readings),
         "readings": readings,
+        # Least-squares slope per hour over the full history window
+        "trends_per_hour": {col: metric_trend(col) for col in HISTORY_COLUMNS},
         "demo_app_url": settings.DEMO_APP_URL,
     }
 
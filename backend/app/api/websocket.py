@@ -1,9 +1,12 @@
+import asyncio
+
 from fastapi import WebSocket
 from typing import List, Dict, Any
-import json
 import logging
 from datetime import datetime
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,22 +26,27 @@ class ConnectionManager:
 
     async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
         try:
-            await websocket.send_text(json.dumps(message, default=str))
+            await websocket.send_text(orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode())
         except Exception as e:
             logger.error(f"Error sending personal message: {e}")
             self.disconnect(websocket)
 
     async def broadcast(self, message: Dict[str, Any]):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message, default=str))
-            except Exception as e:
-                logger.error(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
-
-        for conn in disconnected:
-            self.disconnect(conn)
+        if not self.active_connections:
+            return
+        # Encode once for every client; sent as a text frame because the
+        # dashboard JSON.parse()s evt.data directly
+        text = orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        connections = list(self.active_connections)
+        # Concurrent sends, so one slow client doesn't hold up the rest
+        results = await asyncio.gather(
+            *(connection.send_text(text) for connection in connections),
+            return_exceptions=True,
+        )
+        for conn, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error broadcasting to connection: {result}")
+                self.disconnect(conn)
 
     async def broadcast_event(self, event_type: str, data: Any, incident_id: str = None, agent: str = None):
         message = {
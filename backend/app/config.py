@@ -39,6 +39,38 @@ class Settings(BaseSettings):
     SIMULATION_MODE: bool = True
     SIMULATION_DELAY_MS: int = 800
 
+    # Artificial delays between agent timeline steps so the dashboard can
+    # follow along. Disable for load tests and batch reprocessing.
+    TIMELINE_PACING_ENABLED: bool = True
+    # Fake backend latency in simulated calls (the monitor's Azure Monitor
+    # queries, MCP tool executions). Off by default: it adds ~1 s to every
+    # monitoring cycle and up to 1 s per MCP tool call.
+    SIMULATE_LATENCY: bool = False
+
+    # Forward a stable prompt fingerprint as `prompt_cache_key` on chat calls.
+    # Off by default: not every Azure OpenAI api-version accepts the field.
+    PROMPT_CACHE_KEY_ENABLED: bool = False
+
+    # In-process cache of LLM responses for recurring incident signatures
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_S: int = 3600
+    # Jaccard similarity (0–1) above which a past diagnosis on the same
+    # service + severity is reused for a near-duplicate incident
+    LLM_SIMILARITY_THRESHOLD: float = 0.9
+    # Also cache generated fixes. Off by default: fixes are sampled at
+    # temperature 0.2, so a cached fix replaces a fresh, possibly better one
+    FIXER_CACHE_ENABLED: bool = False
+    # Coalesce fix requests arriving together (incident bursts) into one
+    # multi-incident GPT-4o call; the system prompt is sent once per batch
+    FIXER_BATCH_ENABLED: bool = False
+
+    # Skip GPT-4o when a known failure signature matches on every signal
+    # and use the matching canned diagnosis instead
+    LLM_SKIP_HIGH_CONFIDENCE: bool = False
+
+    # Hard upper bound on a single agent's GPT-4o call (retries included)
+    LLM_TIMEOUT_S: float = 25.0
+
     # Confidence threshold for automated remediation (0–100 scale).
     # >= threshold  → auto-fix and deploy
     # <  threshold  → escalate to human review (skip deploy phase)
@@ -47,6 +79,8 @@ class Settings(BaseSettings):
     # Demo App — ShopDemo e-commerce target monitored by CodeOps Sentinel
     DEMO_APP_URL: str = "https://shopdemo.wonderfulocean-93fc426c.eastus.azurecontainerapps.io"
     MONITORING_INTERVAL_SECONDS: int = 10
+    # Upper bound on per-service metric fetches in flight during one pipeline check
+    MONITOR_MAX_CONCURRENCY: int = 8
 
     # Alert thresholds (mirrors demo-app health logic)
     ALERT_MEMORY_MB_CRITICAL: float = 400.0
@@ -140,6 +140,20 @@ async def lifespan(app: FastAPI):
         except (asyncio.TimeoutError, asyncio.CancelledError):
             _monitor_task.cancel()
 
+    # Close shared outbound HTTP clients
+    try:
+        from services.http_clients import close_http_clients
+        await close_http_clients()
+    except Exception as e:
+        logger.warning(f"HTTP client shutdown skipped: {e}")
+
+    # Stop the LLM batcher worker
+    try:
+        from services.foundry_service import get_foundry_service
+        await get_foundry_service().aclose()
+    except Exception as e:
+        logger.warning(f"FoundryService shutdown skipped: {e}")
+
     logger.info(json.dumps({"event": "shutdown", "app": settings.APP_NAME}))
 
 
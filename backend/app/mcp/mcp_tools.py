@@ -13,13 +13,14 @@ Tools are grouped by the agent that owns them:
   fixer.*       — FixerAgent
   deploy.*      — DeployAgent
 """
-import asyncio
 import logging
 import random
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Any
 
+from services.pacing import simulated_latency
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,7 +69,7 @@ class MonitorCheckHealthTool(MCPTool):
 
     async def execute(self, params: dict) -> dict:
         service = params.get("service", "all-services")
-        await asyncio.sleep(0.2)  # simulate I/O
+        await simulated_latency(0.2)
         return {
             "service": service,
             "status": random.choice(["healthy", "degraded", "degraded"]),
@@ -109,7 +110,7 @@ class MonitorGetMetricsTool(MCPTool):
     async def execute(self, params: dict) -> dict:
         service = params.get("service", "unknown")
         window = params.get("window_minutes", 15)
-        await asyncio.sleep(0.3)
+        await simulated_latency(0.3)
         return {
             "service": service,
             "window_minutes": window,
@@ -149,7 +150,7 @@ class DiagnosticAnalyzeIncidentTool(MCPTool):
     }
 
     async def execute(self, params: dict) -> dict:
-        await asyncio.sleep(0.8)
+        await simulated_latency(0.8)
         return {
             "incident_id": params.get("incident_id"),
             "root_cause": "Simulated root cause analysis from MCP tool",
@@ -176,7 +177,7 @@ class DiagnosticGetRootCauseTool(MCPTool):
     }
 
     async def execute(self, params: dict) -> dict:
-        await asyncio.sleep(0.1)
+        await simulated_latency(0.1)
         return {
             "incident_id": params.get("incident_id"),
             "root_cause": "Retrieved from diagnosis store",
@@ -208,7 +209,7 @@ class FixerGeneratePatchTool(MCPTool):
     }
 
     async def execute(self, params: dict) -> dict:
-        await asyncio.sleep(0.6)
+        await simulated_latency(0.6)
         return {
             "incident_id": params.get("incident_id"),
             "file_path": f"src/services/{params.get('service', 'unknown')}.ts",
@@ -238,7 +239,7 @@ class FixerValidateFixTool(MCPTool):
     }
 
     async def execute(self, params: dict) -> dict:
-        await asyncio.sleep(0.3)
+        await simulated_latency(0.3)
         return {
             "fix_id": params.get("fix_id"),
             "valid": True,
@@ -274,7 +275,7 @@ class DeployExecuteDeploymentTool(MCPTool):
     }
 
     async def execute(self, params: dict) -> dict:
-        await asyncio.sleep(1.0)
+        await simulated_latency(1.0)
         return {
             "incident_id": params.get("incident_id"),
             "fix_id": params.get("fix_id"),
@@ -302,7 +303,7 @@ class DeployRollbackTool(MCPTool):
     }
 
     async def execute(self, params: dict) -> dict:
-        await asyncio.sleep(0.5)
+        await simulated_latency(0.5)
         return {
             "incident_id": params.get("incident_id"),
             "service": params.get("service"),
@@ -1,9 +1,15 @@
-from pydantic import BaseModel, Field
+from pydantic import AwareDatetime, BaseModel, Field, computed_field
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Optional
+import time
 import uuid
 
+# Anchor pair used to render monotonic timestamps as wall-clock time
+_WALL_ANCHOR_NS = time.time_ns()
+_MONO_ANCHOR_NS = time.monotonic_ns()
+_UTC = timezone.utc
+
 
 class MessageType(str, Enum):
     INCIDENT_DETECTED = "INCIDENT_DETECTED"
@@ -40,6 +46,26 @@ class AgentStatus(BaseModel):
     status: str = "idle"  # idle | working | done | error
     current_task: Optional[str] = None
     last_action: Optional[str] = None
-    last_action_time: Optional[datetime] = None
+    # time.monotonic_ns() of the last action — cheap to stamp on every
+    # transition; converted to a datetime only when serialized.
+    last_action_time_ns: Optional[int] = Field(default=None, exclude=True)
     incidents_handled: int = 0
     success_rate: float = 1.0
+
+    @computed_field
+    @property
+    def last_action_time(self) -> Optional[AwareDatetime]:
+        if self.last_action_time_ns is None:
+            return None
+        wall_ns = _WALL_ANCHOR_NS + (self.last_action_time_ns - _MONO_ANCHOR_NS)
+        return datetime.fromtimestamp(wall_ns / 1e9, _UTC)
+
+    @last_action_time.setter
+    def last_action_time(self, value: Optional[datetime]) -> None:
+        if value is None:
+            self.last_action_time_ns = None
+            return
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=_UTC)
+        wall_ns = int(value.timestamp() * 1e9)
+        self.last_action_time_ns = _MONO_ANCHOR_NS + (wall_ns - _WALL_ANCHOR_NS)
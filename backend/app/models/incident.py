@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from enum import Enum
 from datetime import datetime
 from typing import Optional, List
@@ -30,6 +30,9 @@ class IncidentTimeline(BaseModel):
     status: str = "info"  # info | success | error | warning
 
 
+_TIMELINE_LIST = TypeAdapter(List[IncidentTimeline])
+
+
 class Diagnosis(BaseModel):
     root_cause: str
     severity: IncidentSeverity
@@ -72,6 +75,7 @@ class Incident(BaseModel):
     github_branch: Optional[str] = None
 
     def add_timeline_event(self, agent: str, action: str, details: str, status: str = "info"):
+        """Append one timeline event in memory (no I/O — safe on the event loop)."""
         event = IncidentTimeline(
             agent=agent,
             action=action,
@@ -82,3 +86,12 @@ class Incident(BaseModel):
         if agent not in self.agents_involved:
             self.agents_involved.append(agent)
         return event
+
+    def add_timeline_events(self, events: List[dict]) -> List[IncidentTimeline]:
+        """Append several timeline events at once, validated in a single pass."""
+        validated = _TIMELINE_LIST.validate_python(events)
+        self.timeline.extend(validated)
+        for event in validated:
+            if event.agent not in self.agents_involved:
+                self.agents_involved.append(event.agent)
+        return validated
@@ -7,24 +7,57 @@ Auto-detects whether to use real AI or simulation based on AZURE_OPENAI_KEY:
 
 Features:
   - Async OpenAI client via asyncio.to_thread (SDK is sync)
+  - One pooled AzureOpenAI client per service, shared by all worker threads
   - Exponential backoff retry (3 attempts) for transient errors
   - Rate limit handling (429 → wait + retry)
   - Structured JSON response parsing with validation
   - Token usage logging for cost tracking
+  - LLMBatcher: base for callers that merge requests arriving within a short window into one call
+  - Optional streaming: completed top-level fields are surfaced while GPT-4o is still decoding
 """
 
 import asyncio
-import json
 import logging
 import random
+import re
+import threading
 import time
-from typing import Any, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+import httpx
+import orjson
 
 from config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Private generator for simulated latencies, mock picks and retry jitter —
+# avoids contending on the shared module-level random state
+_rng = random.Random()
+
+# A top-level scalar field that has fully arrived in a partially streamed JSON
+# object: a closed string, or a number followed by its delimiter.
+_STREAM_FIELD_RE = re.compile(
+    r'"(\w+)"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?=\s*[,}]))'
+)
+# The key and opening quote of a string value, which may still be streaming
+_STREAM_OPEN_RE = re.compile(r'"(\w+)"\s*:\s*"')
+
+
+def _closing_quote(text: str, pos: int) -> int:
+    """Index of the first unescaped '"' at or after pos, or -1 if none yet."""
+    while (pos := text.find('"', pos)) >= 0:
+        start = pos
+        while start > 0 and text[start - 1] == "\\":
+            start -= 1
+        if (pos - start) % 2 == 0:
+            return pos
+        pos += 1
+    return -1
+
 # ─── Simulation fallback data ─────────────────────────────────────────────────
 
 _MOCK_DIAGNOSES = [
@@ -118,6 +151,119 @@ _MOCK_FIXES = [
 ]
 
 
+def _freeze(entry: dict) -> Mapping[str, Any]:
+    """Read-only view of a mock entry with list values turned into tuples."""
+    return MappingProxyType(
+        {k: tuple(v) if isinstance(v, list) else v for k, v in entry.items()}
+    )
+
+
+# The same entries are handed to every caller — freeze them so none can mutate the pool
+_MOCK_DIAGNOSES = tuple(map(_freeze, _MOCK_DIAGNOSES))
+_MOCK_FIXES = tuple(map(_freeze, _MOCK_FIXES))
+
+# Mock diagnoses precise enough to stand in for GPT-4o on a rule-engine match
+_CANNED_DIAGNOSES = {
+    "n_plus_one": _MOCK_DIAGNOSES[0],
+    "listener_leak": _MOCK_DIAGNOSES[1],
+    "oom_killed": _MOCK_DIAGNOSES[3],
+}
+
+# Root-cause keyword → matching mock fix, scanned in one pass by a single
+# case-insensitive alternation (leftmost keyword wins)
+_FIX_KEYWORDS = {
+    "n+1": 0,
+    "eager loading": 0,
+    "eventemitter": 1,
+    "listener": 1,
+    "index": 2,
+    "sequential scan": 2,
+    "oomkill": 3,
+    "memory limit": 3,
+}
+_FIX_KEYWORD_RE = re.compile("|".join(map(re.escape, _FIX_KEYWORDS)), re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def _mock_fix_index(root_cause: str) -> Optional[int]:
+    """Index of the mock fix for a root cause — recurring root causes skip the scan."""
+    m = _FIX_KEYWORD_RE.search(root_cause)
+    return _FIX_KEYWORDS[m.group().lower()] if m else None
+
+
+# ─── LLMBatcher ───────────────────────────────────────────────────────────────
+
+class LLMBatcher:
+    """
+    Collects chat requests arriving within a short window and dispatches them
+    together.  Subclasses override _dispatch to merge a batch into a single
+    call (see FixBatcher); the base _dispatch just runs one call per request
+    concurrently, which subclasses use as their per-request fallback.
+
+    Each dispatched batch runs as its own task, so collection of the next
+    window never waits on the previous batch's responses.
+    """
+
+    def __init__(
+        self,
+        call: Callable[..., Awaitable[dict]],
+        window_s: float = 0.025,
+        max_batch: int = 16,
+    ):
+        self._call = call
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: set[asyncio.Task] = set()  # strong refs to dispatch tasks
+
+    async def submit(self, **kwargs) -> dict:
+        """Enqueue one request and wait for its result."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fut, kwargs))
+        return await fut
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list) -> None:
+        if len(batch) > 1:
+            logger.info(f"LLMBatcher: dispatching {len(batch)} requests together")
+        results = await asyncio.gather(
+            *(self._call(**kwargs) for _, kwargs in batch),
+            return_exceptions=True,
+        )
+        for (fut, _), res in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+
 # ─── FoundryService ───────────────────────────────────────────────────────────
 
 class FoundryService:
@@ -140,6 +286,9 @@ class FoundryService:
         )
         mode = "REAL Azure OpenAI" if self.use_real_ai else "SIMULATION"
         logger.info(f"FoundryService initialized — mode: {mode}, deployment: {self.deployment}")
+        # Built on first real call; reused so keep-alive connections survive between calls
+        self._client = None
+        self._client_lock = threading.Lock()
 
     # ── Public API ─────────────────────────────────────────────────────────────
 
@@ -150,24 +299,52 @@ class FoundryService:
         temperature: float = 0.1,
         max_tokens: int = 1500,
         expect_json: bool = True,
+        prompt_cache_key: Optional[str] = None,
+        on_partial: Optional[Callable[[dict], None]] = None,
+        user_preamble: Optional[str] = None,
     ) -> dict:
         """
         Call Azure OpenAI chat completion.
         Returns dict with keys: content, tokens_used, model, latency_ms, source.
         Falls back to simulation on any error.
+
+        prompt_cache_key is a stable fingerprint of the static system prompt;
+        it is forwarded to the provider only when PROMPT_CACHE_KEY_ENABLED is set.
+
+        user_preamble, if given, is sent as a separate user message ahead of
+        user_message.  Keeping it static extends the byte-identical prefix the
+        provider can cache past the system prompt; the per-call data goes last.
+
+        When on_partial is given the completion is streamed and the callback is
+        invoked on the event loop with each batch of newly completed top-level
+        scalar fields (e.g. {"root_cause": ..., "severity": ...}).  The full
+        result is still returned once the stream ends.
         """
         if not self.use_real_ai:
-            await asyncio.sleep(random.uniform(0.6, 1.2))  # simulate network latency
+            await asyncio.sleep(_rng.uniform(0.6, 1.2))  # simulate network latency
             return {
                 "content": None,  # callers handle None as "use simulation"
                 "tokens_used": 0,
                 "model": "simulation",
-                "latency_ms": random.randint(600, 1200),
+                "latency_ms": _rng.randint(600, 1200),
                 "source": "simulation",
             }
 
         start = time.monotonic()
-        result = await self._call_with_retry(system_prompt, user_message, temperature, max_tokens)
+        forward_partial = None
+        if on_partial is not None:
+            # The stream is consumed in a worker thread — hop back onto the loop
+            loop = asyncio.get_running_loop()
+            forward_partial = lambda fields: loop.call_soon_threadsafe(on_partial, fields)
+        result = await self._call_with_retry(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            prompt_cache_key=prompt_cache_key,
+            on_partial=forward_partial,
+            user_preamble=user_preamble,
+        )
         latency_ms = int((time.monotonic() - start) * 1000)
 
         result["latency_ms"] = latency_ms
@@ -179,19 +356,33 @@ class FoundryService:
 
     async def analyze_with_context(self, context: str, query: str) -> dict:
         """Generic contextual analysis — wraps chat_completion with a generic SRE system prompt."""
-        from ..agents.agent_prompts import DIAGNOSTIC_SYSTEM_PROMPT
+        from agents.agent_prompts import DIAGNOSTIC_PROMPT  # lazy: agents import this module
         return await self.chat_completion(
-            system_prompt=DIAGNOSTIC_SYSTEM_PROMPT,
+            system_prompt=DIAGNOSTIC_PROMPT.text,
+            prompt_cache_key=DIAGNOSTIC_PROMPT.key,
             user_message=f"Context:\n{context}\n\nQuery: {query}",
         )
 
-    def get_mock_diagnosis(self) -> dict:
+    async def aclose(self) -> None:
+        """Close the pooled client — called once on shutdown."""
+        if self._client is not None:
+            await asyncio.to_thread(self._client.close)
+            self._client = None
+
+    def get_mock_diagnosis(self) -> Mapping[str, Any]:
         """Return a random realistic mock diagnosis for simulation mode."""
-        return random.choice(_MOCK_DIAGNOSES)
+        return _rng.choice(_MOCK_DIAGNOSES)
+
+    def get_canned_diagnosis(self, kind: str) -> Mapping[str, Any]:
+        """Return the canned diagnosis for a rule-engine match (see DiagnosticAgent)."""
+        return _CANNED_DIAGNOSES[kind]
 
-    def get_mock_fix(self) -> dict:
-        """Return a random realistic mock fix for simulation mode."""
-        return random.choice(_MOCK_FIXES)
+    def get_mock_fix(self, root_cause: Optional[str] = None) -> Mapping[str, Any]:
+        """Return the mock fix matching the root cause, or a random one for simulation mode."""
+        idx = _mock_fix_index(root_cause) if root_cause else None
+        if idx is not None:
+            return _MOCK_FIXES[idx]
+        return _rng.choice(_MOCK_FIXES)
 
     # ── Internal: retry + parsing ──────────────────────────────────────────────
 
@@ -202,6 +393,9 @@ class FoundryService:
         temperature: float,
         max_tokens: int,
         max_retries: int = 3,
+        prompt_cache_key: Optional[str] = None,
+        on_partial: Optional[Callable[[dict], None]] = None,
+        user_preamble: Optional[str] = None,
     ) -> dict:
         """Execute OpenAI call with exponential backoff on transient errors."""
         last_error: Optional[Exception] = None
@@ -214,6 +408,9 @@ class FoundryService:
                     user_message,
                     temperature,
                     max_tokens,
+                    prompt_cache_key,
+                    on_partial,
+                    user_preamble,
                 )
             except Exception as e:
                 last_error = e
@@ -221,13 +418,13 @@ class FoundryService:
 
                 # Rate limit: honour Retry-After header if present
                 if "429" in error_str or "rate limit" in error_str:
-                    wait = (2 ** attempt) + random.uniform(0, 1)
+                    wait = (2 ** attempt) + _rng.uniform(0, 1)
                     logger.warning(f"FoundryService: Rate limited (attempt {attempt}/{max_retries}). Waiting {wait:.1f}s")
                     await asyncio.sleep(wait)
 
                 # Transient server error: backoff and retry
                 elif any(code in error_str for code in ("500", "502", "503", "timeout")):
-                    wait = (2 ** attempt) * 0.5 + random.uniform(0, 0.5)
+                    wait = (2 ** attempt) * 0.5 + _rng.uniform(0, 0.5)
                     logger.warning(f"FoundryService: Transient error (attempt {attempt}/{max_retries}): {e}. Waiting {wait:.1f}s")
                     await asyncio.sleep(wait)
 
@@ -251,35 +448,72 @@ class FoundryService:
             "source": "error_fallback",
         }
 
+    def _get_client(self):
+        """Return the shared AzureOpenAI client, building it once across worker threads."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AzureOpenAI
+
+                    self._client = AzureOpenAI(
+                        azure_endpoint=self.endpoint,
+                        api_key=self.api_key,
+                        api_version="2024-08-01-preview",
+                        http_client=httpx.Client(
+                            limits=httpx.Limits(
+                                max_keepalive_connections=20,
+                                max_connections=100,
+                                keepalive_expiry=60.0,
+                            ),
+                        ),
+                    )
+        return self._client
+
     def _sync_call(
         self,
         system_prompt: str,
         user_message: str,
         temperature: float,
         max_tokens: int,
+        prompt_cache_key: Optional[str] = None,
+        on_partial: Optional[Callable[[dict], None]] = None,
+        user_preamble: Optional[str] = None,
     ) -> dict:
         """Synchronous OpenAI call — runs in a thread via asyncio.to_thread."""
-        from openai import AzureOpenAI
-
-        client = AzureOpenAI(
-            azure_endpoint=self.endpoint,
-            api_key=self.api_key,
-            api_version="2024-08-01-preview",
+        client = self._get_client()
+
+        # Static prefix first (system, optional preamble), dynamic tail last
+        messages = [{"role": "system", "content": system_prompt}]
+        if user_preamble:
+            messages.append({"role": "user", "content": user_preamble})
+        messages.append({"role": "user", "content": user_message})
+
+        # Streamed completions only report usage in a final chunk when asked to
+        stream_kwargs = (
+            {"stream": True, "stream_options": {"include_usage": True}}
+            if on_partial is not None
+            else {}
         )
-
         response = client.chat.completions.create(
+            **stream_kwargs,
             model=self.deployment,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
+            messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
             response_format={"type": "json_object"},  # enforce JSON output
+            # System prompt is byte-stable, so the provider can serve its prefix from cache
+            extra_body=(
+                {"prompt_cache_key": prompt_cache_key}
+                if prompt_cache_key and settings.PROMPT_CACHE_KEY_ENABLED
+                else None
+            ),
         )
 
-        content = response.choices[0].message.content
-        tokens = response.usage.total_tokens if response.usage else 0
+        if on_partial is not None:
+            content, tokens = self._consume_stream(response, on_partial)
+        else:
+            content = response.choices[0].message.content
+            tokens = response.usage.total_tokens if response.usage else 0
 
         logger.debug(f"FoundryService raw response ({tokens} tokens): {content[:200]}...")
 
@@ -290,6 +524,51 @@ class FoundryService:
             "source": "azure_openai",
         }
 
+    @staticmethod
+    def _consume_stream(stream, on_partial: Callable[[dict], None]) -> tuple:
+        """
+        Accumulate a streamed completion, reporting top-level fields as they close.
+        Only the unscanned tail is searched on each chunk, and while a long
+        string value (e.g. fixed_code) is still open only the new text is
+        searched for its closing quote, so work stays linear.
+        """
+        buf = ""
+        scan_from = 0
+        open_key, open_at, resume = None, 0, 0  # string value still streaming
+        tokens = 0
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                tokens = chunk.usage.total_tokens
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            buf += delta
+            fields = {}
+            if open_key is not None:
+                end = _closing_quote(buf, resume)
+                if end < 0:
+                    resume = len(buf)
+                    continue
+                try:
+                    fields[open_key] = orjson.loads(buf[open_at:end + 1])
+                except orjson.JSONDecodeError:
+                    pass
+                open_key, scan_from = None, end + 1
+            for m in _STREAM_FIELD_RE.finditer(buf, scan_from):
+                try:
+                    fields[m.group(1)] = orjson.loads(m.group(2))
+                except orjson.JSONDecodeError:
+                    continue
+                scan_from = m.end()
+            opener = _STREAM_OPEN_RE.search(buf, scan_from)
+            if opener and _closing_quote(buf, opener.end()) < 0:
+                open_key, open_at, resume = opener.group(1), opener.end() - 1, len(buf)
+            if fields:
+                on_partial(fields)
+        return buf, tokens
+
     @staticmethod
     def parse_json_response(raw: Optional[str], fallback: dict) -> dict:
         """
@@ -299,16 +578,16 @@ class FoundryService:
         if not raw:
             return fallback
         try:
-            parsed = json.loads(raw)
+            parsed = orjson.loads(raw)
             return parsed
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             # Try to extract JSON block from within text
             import re
             match = re.search(r"\{.*\}", raw, re.DOTALL)
             if match:
                 try:
-                    return json.loads(match.group())
-                except json.JSONDecodeError:
+                    return orjson.loads(match.group())
+                except orjson.JSONDecodeError:
                     pass
             logger.warning(f"FoundryService: Could not parse JSON response, using fallback. Raw: {raw[:200]}")
             return fallback
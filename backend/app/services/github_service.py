@@ -5,19 +5,76 @@ Creates real branches, commits fix files, and opens Pull Requests
 when the Fixer Agent remediates an incident.  Falls back gracefully
 when GITHUB_TOKEN is empty or the API returns errors.
 """
+import asyncio
 import base64
 import logging
 from datetime import datetime, timezone
 from typing import Optional
 
 import httpx
+import orjson
 
 from config import get_settings
+from services.http_clients import get_github_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-_API = "https://api.github.com"
+
+# ── Report templates (filled with str.format_map per PR) ──────────────────────
+
+_FIX_REPORT_TEMPLATE = (
+    "# Incident Fix: {incident_id}\n\n"
+    "## Diagnosis\n"
+    "- **Root Cause**: {root_cause}\n"
+    "- **Severity**: {severity}\n"
+    "- **Affected Services**: {affected}\n"
+    "- **Detected At**: {now}\n\n"
+    "## Recommended Fix\n"
+    "{fix_content}\n\n"
+    "## Code Changes\n"
+    "```python\n"
+    "# Original code (problematic)\n"
+    "{original_code}\n\n"
+    "# Fixed code\n"
+    "{fixed_code}\n"
+    "```\n\n"
+    "## Auto-Remediation Applied\n"
+    "- **Action**: Stopped chaos experiment via API\n"
+    "- **Result**: Service recovered\n"
+    "- **Resolution Time**: {resolution_time}\n\n"
+    "## Generated by\n"
+    "CodeOps Sentinel — Fixer Agent v2.0  \n"
+    "Powered by Azure OpenAI GPT-4o + Microsoft Agent Framework\n"
+)
+
+_METRICS_TABLE_TEMPLATE = (
+    "| Metric | Before | After |\n"
+    "|--------|--------|-------|\n"
+    "| Memory | {mem_before} MB | {mem_after} MB |\n"
+    "| CPU | {cpu_before}% | {cpu_after}% |\n"
+    "| Error Rate | {err_before}% | {err_after}% |\n"
+    "| Latency | {lat_before} ms | {lat_after} ms |\n"
+)
+
+_PR_BODY_TEMPLATE = (
+    "## Summary\n"
+    "Automated fix for incident **{incident_id}**.\n\n"
+    "## Diagnosis\n"
+    "- **Root Cause**: {root_cause}\n"
+    "- **Severity**: {severity}\n"
+    "- **Affected Services**: {affected}\n\n"
+    "## Actions Taken\n"
+    "1. Detected anomaly via real-time monitoring\n"
+    "2. Ran AI-powered diagnosis (Azure OpenAI GPT-4o)\n"
+    "3. Stopped active chaos experiments via `/chaos/stop`\n"
+    "4. Verified service recovery via `/health`\n"
+    "5. Generated fix documentation and opened this PR\n\n"
+    "{metrics}"
+    "---\n"
+    "> \U0001f916 Generated by **CodeOps Sentinel** — Fixer Agent v2.0  \n"
+    "> Powered by Azure OpenAI GPT-4o + Microsoft Agent Framework\n"
+)
 
 
 class GitHubService:
@@ -27,6 +84,7 @@ class GitHubService:
         self.token: str = settings.GITHUB_TOKEN
         self.repo: str = settings.GITHUB_REPO          # "owner/repo"
         self.base_branch: str = settings.GITHUB_BASE_BRANCH
+        self._background: set[asyncio.Task] = set()  # strong refs to label tasks
 
     # ── helpers ──────────────────────────────────────────────────────────────
 
@@ -42,7 +100,8 @@ class GitHubService:
         }
 
     def _url(self, path: str) -> str:
-        return f"{_API}/repos/{self.repo}{path}"
+        # Relative to the shared client's https://api.github.com base
+        return f"/repos/{self.repo}{path}"
 
     async def _request(
         self,
@@ -52,14 +111,20 @@ class GitHubService:
         json: dict | None = None,
         timeout: float = 15.0,
     ) -> httpx.Response:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            resp = await client.request(
-                method,
-                self._url(path),
-                headers=self._headers(),
-                json=json,
-            )
-        return resp
+        headers = self._headers()
+        content = None
+        if json is not None:
+            # orjson emits bytes directly — the base64 file payloads are the
+            # largest bodies in the fix flow
+            content = orjson.dumps(json)
+            headers["Content-Type"] = "application/json"
+        return await get_github_client().request(
+            method,
+            self._url(path),
+            headers=headers,
+            content=content,
+            timeout=timeout,
+        )
 
     # ── (a) create fix branch ────────────────────────────────────────────────
 
@@ -116,30 +181,17 @@ class GitHubService:
         if isinstance(affected, list):
             affected = ", ".join(affected)
 
-        md = (
-            f"# Incident Fix: {incident_id}\n\n"
-            f"## Diagnosis\n"
-            f"- **Root Cause**: {root_cause}\n"
-            f"- **Severity**: {severity}\n"
-            f"- **Affected Services**: {affected}\n"
-            f"- **Detected At**: {now}\n\n"
-            f"## Recommended Fix\n"
-            f"{fix_content}\n\n"
-            f"## Code Changes\n"
-            f"```python\n"
-            f"# Original code (problematic)\n"
-            f"{original_code or '# N/A'}\n\n"
-            f"# Fixed code\n"
-            f"{fixed_code or '# N/A'}\n"
-            f"```\n\n"
-            f"## Auto-Remediation Applied\n"
-            f"- **Action**: Stopped chaos experiment via API\n"
-            f"- **Result**: Service recovered\n"
-            f"- **Resolution Time**: {resolution_time or 'N/A'}\n\n"
-            f"## Generated by\n"
-            f"CodeOps Sentinel — Fixer Agent v2.0  \n"
-            f"Powered by Azure OpenAI GPT-4o + Microsoft Agent Framework\n"
-        )
+        md = _FIX_REPORT_TEMPLATE.format_map({
+            "incident_id": incident_id,
+            "root_cause": root_cause,
+            "severity": severity,
+            "affected": affected,
+            "now": now,
+            "fix_content": fix_content,
+            "original_code": original_code or "# N/A",
+            "fixed_code": fixed_code or "# N/A",
+            "resolution_time": resolution_time or "N/A",
+        })
 
         encoded = base64.b64encode(md.encode()).decode()
         path = f"fixes/{incident_id}.md"
@@ -188,40 +240,25 @@ class GitHubService:
         # Build body
         before_block = ""
         if metrics_before:
-            before_block = (
-                f"| Metric | Before | After |\n"
-                f"|--------|--------|-------|\n"
-                f"| Memory | {metrics_before.get('memory_usage_mb', '?')} MB"
-                f" | {metrics_after.get('memory_usage_mb', '?') if metrics_after else '?'} MB |\n"
-                f"| CPU | {metrics_before.get('cpu_percent', '?')}%"
-                f" | {metrics_after.get('cpu_percent', '?') if metrics_after else '?'}% |\n"
-                f"| Error Rate | {metrics_before.get('error_rate', '?')}%"
-                f" | {metrics_after.get('error_rate', '?') if metrics_after else '?'}% |\n"
-                f"| Latency | {metrics_before.get('avg_latency_ms', '?')} ms"
-                f" | {metrics_after.get('avg_latency_ms', '?') if metrics_after else '?'} ms |\n"
-            )
-
-        body = (
-            f"## Summary\n"
-            f"Automated fix for incident **{incident_id}**.\n\n"
-            f"## Diagnosis\n"
-            f"- **Root Cause**: {root_cause}\n"
-            f"- **Severity**: {severity}\n"
-            f"- **Affected Services**: {affected}\n\n"
-            f"## Actions Taken\n"
-            f"1. Detected anomaly via real-time monitoring\n"
-            f"2. Ran AI-powered diagnosis (Azure OpenAI GPT-4o)\n"
-            f"3. Stopped active chaos experiments via `/chaos/stop`\n"
-            f"4. Verified service recovery via `/health`\n"
-            f"5. Generated fix documentation and opened this PR\n\n"
-        )
-        if before_block:
-            body += f"## Metrics Before / After\n{before_block}\n"
-        body += (
-            f"---\n"
-            f"> \U0001f916 Generated by **CodeOps Sentinel** — Fixer Agent v2.0  \n"
-            f"> Powered by Azure OpenAI GPT-4o + Microsoft Agent Framework\n"
-        )
+            after = metrics_after or {}
+            before_block = _METRICS_TABLE_TEMPLATE.format_map({
+                "mem_before": metrics_before.get("memory_usage_mb", "?"),
+                "mem_after": after.get("memory_usage_mb", "?"),
+                "cpu_before": metrics_before.get("cpu_percent", "?"),
+                "cpu_after": after.get("cpu_percent", "?"),
+                "err_before": metrics_before.get("error_rate", "?"),
+                "err_after": after.get("error_rate", "?"),
+                "lat_before": metrics_before.get("avg_latency_ms", "?"),
+                "lat_after": after.get("avg_latency_ms", "?"),
+            })
+
+        body = _PR_BODY_TEMPLATE.format_map({
+            "incident_id": incident_id,
+            "root_cause": root_cause,
+            "severity": severity,
+            "affected": affected,
+            "metrics": f"## Metrics Before / After\n{before_block}\n" if before_block else "",
+        })
 
         resp = await self._request(
             "POST",
@@ -242,15 +279,11 @@ class GitHubService:
         pr_number = pr["number"]
         pr_url = pr["html_url"]
 
-        # Best-effort: add labels
-        try:
-            await self._request(
-                "POST",
-                f"/issues/{pr_number}/labels",
-                json={"labels": ["auto-fix", "agent-generated"]},
-            )
-        except Exception:
-            pass  # labels are optional
+        # Best-effort labels: nothing downstream reads them, so don't hold the
+        # caller for another round trip
+        task = asyncio.create_task(self._add_labels(pr_number))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
 
         logger.info(f"[GITHUB] PR #{pr_number} created: {pr_url}")
         return {
@@ -260,6 +293,16 @@ class GitHubService:
             "status": "open",
         }
 
+    async def _add_labels(self, pr_number: int) -> None:
+        try:
+            await self._request(
+                "POST",
+                f"/issues/{pr_number}/labels",
+                json={"labels": ["auto-fix", "agent-generated"]},
+            )
+        except Exception:
+            pass  # labels are optional
+
     # ── (d) get PR status ────────────────────────────────────────────────────
 
     async def get_pr_status(self, pr_number: int) -> dict:
@@ -0,0 +1,69 @@
+"""
+Shared httpx clients for outbound calls made by the agents.
+
+A single long-lived AsyncClient keeps TCP/TLS connections to the ShopDemo
+app alive between requests instead of paying a fresh handshake on every
+poll.  HTTP/2 is negotiated via ALPN when the app is served over TLS (e.g.
+Azure Container Apps), so concurrent polls multiplex on one connection;
+plain-http local runs fall back to HTTP/1.1 keep-alive.  The GitHub REST
+client works the same way, so the branch → commit → PR → labels calls of
+one fix share a connection.  Clients are created lazily and closed from the
+FastAPI lifespan.
+"""
+import logging
+from typing import Optional
+
+import httpx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_demo_client: Optional[httpx.AsyncClient] = None
+_github_client: Optional[httpx.AsyncClient] = None
+
+
+def get_demo_client() -> httpx.AsyncClient:
+    """Return the shared ShopDemo client (created once, re-created if closed)."""
+    global _demo_client
+    if _demo_client is None or _demo_client.is_closed:
+        _demo_client = httpx.AsyncClient(
+            base_url=settings.DEMO_APP_URL,
+            http2=True,
+            # Fail fast on connect so an unreachable app doesn't stall a poll
+            timeout=httpx.Timeout(8.0, connect=2.0),
+            # Idle sockets must outlive the monitor's poll interval to be reused
+            limits=httpx.Limits(
+                max_keepalive_connections=10,
+                max_connections=20,
+                keepalive_expiry=max(60.0, settings.MONITORING_INTERVAL_SECONDS * 2.0),
+            ),
+        )
+    return _demo_client
+
+
+def get_github_client() -> httpx.AsyncClient:
+    """Return the shared GitHub REST client (created once, re-created if closed)."""
+    global _github_client
+    if _github_client is None or _github_client.is_closed:
+        _github_client = httpx.AsyncClient(
+            base_url="https://api.github.com",
+            http2=True,
+            timeout=httpx.Timeout(15.0),
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+    return _github_client
+
+
+async def close_http_clients() -> None:
+    """Close all shared clients — called once on application shutdown."""
+    global _demo_client, _github_client
+    if _demo_client is not None and not _demo_client.is_closed:
+        await _demo_client.aclose()
+        logger.info("Shared ShopDemo HTTP client closed")
+    if _github_client is not None and not _github_client.is_closed:
+        await _github_client.aclose()
+        logger.info("Shared GitHub HTTP client closed")
+    _demo_client = None
+    _github_client = None
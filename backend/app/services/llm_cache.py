@@ -0,0 +1,143 @@
+"""
+In-process response cache for LLM calls (cache-aside).
+
+Recurring incidents (the same N+1 query, OOMKill or EventEmitter leak firing
+every hour) produce near-identical GPT-4o prompts.  Callers derive a key
+from a normalized incident signature, check the cache before calling the
+model, and store the raw JSON content after a successful call.
+
+Bounded LRU with a per-entry TTL; single event loop, so no locking needed.
+SimilarityCache extends this to near-duplicates whose wording differs.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-entry TTL."""
+
+    def __init__(self, name: str, maxsize: int = 512, ttl_s: float = 3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Any, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SimilarityCache:
+    """
+    Near-duplicate lookup for recurring incidents whose wording drifts.
+
+    Entries are token sets compared by Jaccard similarity.  A hit also
+    requires an identical context tag (e.g. service + severity), so two
+    similar-sounding incidents on different services never share a result.
+    Bounded LRU with per-entry TTL.  Entries are bucketed by tag, so a
+    lookup scans only that tag's entries and drops expired ones as it goes.
+    """
+
+    def __init__(
+        self, name: str, maxsize: int = 1000, threshold: float = 0.9, ttl_s: float = 3600.0
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        # tag -> entry id -> (expires_at, tokens, value), each in LRU order
+        self._buckets: "dict[Any, OrderedDict[int, tuple[float, frozenset, Any]]]" = {}
+        # Global LRU order across tags (entry id -> tag), used for maxsize eviction
+        self._order: "OrderedDict[int, Any]" = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tag: Any, tokens: frozenset) -> Optional[Any]:
+        bucket = self._buckets.get(tag)
+        if not bucket:
+            self.misses += 1
+            return None
+        now = time.monotonic()
+        best_id, best_score = None, self.threshold
+        expired = []
+        for entry_id, (expires_at, entry_tokens, _) in bucket.items():
+            if expires_at < now:
+                expired.append(entry_id)
+                continue
+            union = len(tokens | entry_tokens)
+            score = len(tokens & entry_tokens) / union if union else 1.0
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+        for entry_id in expired:
+            del bucket[entry_id]
+            del self._order[entry_id]
+        if not bucket:
+            del self._buckets[tag]
+        if best_id is None:
+            self.misses += 1
+            return None
+        bucket.move_to_end(best_id)
+        self._order.move_to_end(best_id)
+        self.hits += 1
+        logger.debug(f"{self.name}: similarity hit (jaccard={best_score:.2f})")
+        return bucket[best_id][2]
+
+    def set(self, tag: Any, tokens: frozenset, value: Any) -> None:
+        entry_id = self._next_id
+        self._next_id += 1
+        self._buckets.setdefault(tag, OrderedDict())[entry_id] = (
+            time.monotonic() + self.ttl_s, tokens, value,
+        )
+        self._order[entry_id] = tag
+        while len(self._order) > self.maxsize:
+            old_id, old_tag = self._order.popitem(last=False)
+            bucket = self._buckets[old_tag]
+            del bucket[old_id]
+            if not bucket:
+                del self._buckets[old_tag]
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._order.clear()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._order),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,25 @@
+"""
+Cosmetic delays shared by the agents.
+
+The pipeline pauses briefly between timeline steps so the dashboard can show
+each one arrive; TIMELINE_PACING_ENABLED turns those pauses off (e.g. for
+load tests).  The simulated monitor queries and MCP tools can also fake
+backend round-trip times, but only when SIMULATE_LATENCY is on.
+"""
+import asyncio
+
+from config import get_settings
+
+settings = get_settings()
+
+
+async def paced_sleep(seconds: float) -> None:
+    """UI pacing between timeline steps — skipped when TIMELINE_PACING_ENABLED is off."""
+    if settings.TIMELINE_PACING_ENABLED:
+        await asyncio.sleep(seconds)
+
+
+async def simulated_latency(seconds: float) -> None:
+    """Fake backend I/O latency — skipped unless SIMULATE_LATENCY is on."""
+    if settings.SIMULATE_LATENCY:
+        await asyncio.sleep(seconds)